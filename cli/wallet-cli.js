@@ -15,6 +15,7 @@ const showHelpFlag =
 
 const generateAddress = process.argv.includes('--gen-address');
 const addressFromWif = process.argv.includes('--address-from-wif');
+const serveMode = process.argv.includes('--serve');
 const compressed = !process.argv.includes('--uncompressed');
 
 const networkName = getArg('--network')?.toLowerCase();
@@ -53,6 +54,15 @@ Generate a new transparent (P2PKH) address:
 Derive address from WIF:
   wallet-cli --network <network> --address-from-wif --wif <private-key-wif>
 
+Serve line-delimited JSON requests on stdin/stdout:
+  wallet-cli --serve
+
+  Each request line is {"id": <n>, "method": <name>, "params": {...}} and is
+  answered by one line {"id": <n>, "result": ...} or {"id": <n>, "error": "..."}.
+  Methods: ping, gen_address {network, compressed}, address_from_wif {network, wif},
+  build_transaction {network, wif, to, amount | outputs: [{address, satoshis}],
+                     fee, utxos, blockheight}
+
 Build and sign a transaction:
   wallet-cli --network <network> \\
     --wif <private-key-wif> \\
@@ -68,6 +78,7 @@ OPTIONS
 --network <name>        Network to use (default: bitcoinz)
 --gen-address           Generate a new address
 --address-from-wif      Derive address from WIF
+--serve                 Keep running and answer JSON requests on stdin
 --uncompressed          Generate uncompressed public key
 
 --wif <wif>             Sender private key (WIF)
@@ -87,108 +98,63 @@ ${Object.keys(NETWORKS).join(', ')}
 `);
 }
 
-if (showHelpFlag) {
-    showHelp();
-    process.exit(0);
-}
-
-if (!network) {
-    console.error(
-        `Unsupported network "${networkName}". Supported: ${Object.keys(NETWORKS).join(', ')}`
-    );
-    process.exit(1);
-}
-
-if (generateAddress) {
-    try {
-        const keyPair = bitgoLib.ECPair.makeRandom({
-            network,
-            compressed
-        });
-
-        const pubKey = keyPair.getPublicKeyBuffer();
-        const pubKeyHash = bitgoLib.crypto.hash160(pubKey);
-
-        const address = bitgoLib.address.toBase58Check(
-            pubKeyHash,
-            network.pubKeyHash
+function getNetwork(name) {
+    const network = NETWORKS[name];
+    if (!network) {
+        throw new Error(
+            `Unsupported network "${name}". Supported: ${Object.keys(NETWORKS).join(', ')}`
         );
-
-        console.log(JSON.stringify({
-            network: networkName,
-            address,
-            wif: keyPair.toWIF(),
-            publicKey: pubKey.toString('hex'),
-            compressed
-        }, null, 2));
-
-        process.exit(0);
-
-    } catch (err) {
-        console.error('Failed to generate address:', err.message);
-        process.exit(1);
     }
+    return network;
 }
 
+function newAddress(network, compressed) {
+    const keyPair = bitgoLib.ECPair.makeRandom({
+        network,
+        compressed
+    });
 
-if (addressFromWif) {
-    try {
-        if (!senderWif) {
-            console.error('Missing --wif argument');
-            process.exit(1);
-        }
-
-        const keyPair = bitgoLib.ECPair.fromWIF(senderWif, network);
+    const pubKey = keyPair.getPublicKeyBuffer();
+    const pubKeyHash = bitgoLib.crypto.hash160(pubKey);
 
-        const pubKey = keyPair.getPublicKeyBuffer();
-        const pubKeyHash = bitgoLib.crypto.hash160(pubKey);
-
-        const address = bitgoLib.address.toBase58Check(
-            pubKeyHash,
-            network.pubKeyHash
-        );
-        console.log(address);
-
-        process.exit(0);
+    const address = bitgoLib.address.toBase58Check(
+        pubKeyHash,
+        network.pubKeyHash
+    );
 
-    } catch (err) {
-        console.error('Failed to derive address from WIF:', err.message);
-        process.exit(1);
-    }
+    return {
+        address,
+        wif: keyPair.toWIF(),
+        publicKey: pubKey.toString('hex'),
+        compressed
+    };
 }
 
+function deriveAddress(network, wif) {
+    const keyPair = bitgoLib.ECPair.fromWIF(wif, network);
 
-if (!senderWif || !recipientAddress || !amountToSend || (!utxoDataString && !utxoFilePath)) {
-    console.error('Missing required arguments.');
-    process.exit(1);
-}
+    const pubKey = keyPair.getPublicKeyBuffer();
+    const pubKeyHash = bitgoLib.crypto.hash160(pubKey);
 
-let rawUtxos;
-try {
-    if (utxoFilePath) {
-        const content = fs.readFileSync(utxoFilePath, 'utf8');
-        rawUtxos = JSON.parse(content);
-    } else {
-        rawUtxos = JSON.parse(utxoDataString);
-    }
-} catch (e) {
-    console.error('Failed to read UTXOs:', e.message);
-    process.exit(1);
+    return bitgoLib.address.toBase58Check(
+        pubKeyHash,
+        network.pubKeyHash
+    );
 }
 
-const utxos = rawUtxos.map(u => ({
-    txid: String(u.txid),
-    vout: Number(u.vout),
-    value: Number(u.satoshis)
-}));
+function buildTransaction(network, wif, outputs, txFee, rawUtxos, height) {
+    const utxos = rawUtxos.map(u => ({
+        txid: String(u.txid),
+        vout: Number(u.vout),
+        value: Number(u.satoshis)
+    }));
 
-try {
-    const keyPair = bitgoLib.ECPair.fromWIF(senderWif, network);
+    const keyPair = bitgoLib.ECPair.fromWIF(wif, network);
     const txb = new bitgoLib.TransactionBuilder(network);
 
     txb.setVersion(bitgoLib.Transaction.ZCASH_SAPLING_VERSION);
     txb.setVersionGroupId(0x892F2085);
-    txb.setExpiryHeight(blockHeight + 300);
+    txb.setExpiryHeight(height + 300);
 
     let totalInput = 0;
     for (const u of utxos) {
@@ -196,9 +162,13 @@ try {
         totalInput += u.value;
     }
 
-    txb.addOutput(recipientAddress, amountToSend);
+    let totalOutput = 0;
+    for (const o of outputs) {
+        txb.addOutput(o.address, o.satoshis);
+        totalOutput += o.satoshis;
+    }
 
-    const changeAmount = totalInput - amountToSend - fee;
+    const changeAmount = totalInput - totalOutput - txFee;
     if (changeAmount > 1000) {
         txb.addOutput(keyPair.getAddress(), changeAmount);
     }
@@ -213,10 +183,150 @@ try {
         );
     }
 
-    const tx = txb.build();
-    console.log(tx.toHex());
+    return txb.build().toHex();
+}
+
+const METHODS = {
+    ping: () => 'pong',
+
+    gen_address: (params) => ({
+        network: params.network,
+        ...newAddress(getNetwork(params.network), params.compressed !== false)
+    }),
+
+    address_from_wif: (params) => deriveAddress(getNetwork(params.network), params.wif),
+
+    build_transaction: (params) => {
+        const outputs = Array.isArray(params.outputs)
+            ? params.outputs.map(o => ({ address: String(o.address), satoshis: parseInt(o.satoshis, 10) }))
+            : [{ address: params.to, satoshis: parseInt(params.amount, 10) }];
+        if (!params.wif || outputs.some(o => !o.address || !o.satoshis) || !Array.isArray(params.utxos)) {
+            throw new Error('Missing required arguments.');
+        }
+        return buildTransaction(
+            getNetwork(params.network),
+            params.wif,
+            outputs,
+            parseInt(params.fee, 10) || 2000,
+            params.utxos,
+            parseInt(params.blockheight, 10) || 0
+        );
+    }
+};
+
+function serve() {
+    const readline = require('readline');
+    const rl = readline.createInterface({ input: process.stdin, terminal: false });
+
+    const reply = (message) => process.stdout.write(JSON.stringify(message) + '\n');
+
+    rl.on('line', (line) => {
+        if (!line.trim()) {
+            return;
+        }
+        let request;
+        try {
+            request = JSON.parse(line);
+        } catch (err) {
+            reply({ id: null, error: `Invalid request: ${err.message}` });
+            return;
+        }
+        const handler = METHODS[request.method];
+        if (!handler) {
+            reply({ id: request.id, error: `Unknown method "${request.method}"` });
+            return;
+        }
+        try {
+            reply({ id: request.id, result: handler(request.params || {}) });
+        } catch (err) {
+            reply({ id: request.id, error: err.message });
+        }
+    });
+
+    rl.on('close', () => process.exit(0));
+}
+
+if (showHelpFlag) {
+    showHelp();
+    process.exit(0);
+}
+
+if (serveMode) {
+    serve();
+} else {
+    runOnce();
+}
+
+function runOnce() {
+    if (!network) {
+        console.error(
+            `Unsupported network "${networkName}". Supported: ${Object.keys(NETWORKS).join(', ')}`
+        );
+        process.exit(1);
+    }
+
+    if (generateAddress) {
+        try {
+            console.log(JSON.stringify({
+                network: networkName,
+                ...newAddress(network, compressed)
+            }, null, 2));
+
+            process.exit(0);
 
-} catch (error) {
-    console.error('An error occurred:', error.message);
-    process.exit(1);
+        } catch (err) {
+            console.error('Failed to generate address:', err.message);
+            process.exit(1);
+        }
+    }
+
+    if (addressFromWif) {
+        try {
+            if (!senderWif) {
+                console.error('Missing --wif argument');
+                process.exit(1);
+            }
+
+            console.log(deriveAddress(network, senderWif));
+
+            process.exit(0);
+
+        } catch (err) {
+            console.error('Failed to derive address from WIF:', err.message);
+            process.exit(1);
+        }
+    }
+
+    if (!senderWif || !recipientAddress || !amountToSend || (!utxoDataString && !utxoFilePath)) {
+        console.error('Missing required arguments.');
+        process.exit(1);
+    }
+
+    let rawUtxos;
+    try {
+        if (utxoFilePath) {
+            const content = fs.readFileSync(utxoFilePath, 'utf8');
+            rawUtxos = JSON.parse(content);
+        } else {
+            rawUtxos = JSON.parse(utxoDataString);
+        }
+    } catch (e) {
+        console.error('Failed to read UTXOs:', e.message);
+        process.exit(1);
+    }
+
+    try {
+        console.log(buildTransaction(
+            network,
+            senderWif,
+            [{ address: recipientAddress, satoshis: amountToSend }],
+            fee,
+            rawUtxos,
+            blockHeight
+        ));
+
+    } catch (error) {
+        console.error('An error occurred:', error.message);
+        process.exit(1);
+    }
 }
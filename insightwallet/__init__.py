@@ -1,4 +1,6 @@
 from .utils import Utils
 from .setup import Setup
 from .api import InsightAPI
-from .vault import Vault
\ No newline at end of file
+from .vault import Vault
+from .worker import WalletWorker
+from .sync import SyncScheduler
\ No newline at end of file
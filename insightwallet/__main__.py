@@ -2,7 +2,7 @@
 from toga import App, MainWindow
 from toga.platform import current_platform
 
-from . import Utils, Setup, InsightAPI, Vault
+from . import Utils, Setup, Vault, WalletWorker, SyncScheduler
 
 
 class InsightWallet(App):
@@ -33,10 +33,11 @@ class InsightWallet(App):
     def startup(self):
         self.coin = None
         self.account = None
-        self.password = None
+        self.session = None
         self.utils = Utils(self)
         self.vault = Vault(self)
-        self.api = InsightAPI(self)
+        self.sync = SyncScheduler(self)
+        self.worker = WalletWorker(self)
         self.setup = Setup(self)
         self.main_window = MainWindow(
             title=f"{self.formal_name} v{self.version}"
@@ -46,9 +47,14 @@ class InsightWallet(App):
         self.main_window.show()
 
     async def on_exit(self):
+        await self.sync.stop()
+        await self.worker.stop()
+        if self.session:
+            await self.session.lock()
+        self.vault.shutdown()
         self.coin = None
         self.account = None
-        self.password = None
+        self.session = None
         return super().on_exit()
 
 
@@ -0,0 +1,65 @@
+
+import hashlib
+
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+B58_INDEX = {c: i for i, c in enumerate(B58_ALPHABET)}
+
+
+def sha256d(data: bytes) -> bytes:
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+
+def hash160(data: bytes) -> bytes:
+    return hashlib.new("ripemd160", hashlib.sha256(data).digest()).digest()
+
+
+def b58encode(data: bytes) -> str:
+    n = int.from_bytes(data, "big")
+    chars = []
+    while n:
+        n, r = divmod(n, 58)
+        chars.append(B58_ALPHABET[r])
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + "".join(reversed(chars))
+
+
+def b58decode(text: str) -> bytes:
+    n = 0
+    for c in text:
+        if c not in B58_INDEX:
+            raise ValueError(f"Invalid base58 character {c!r}")
+        n = n * 58 + B58_INDEX[c]
+    pad = len(text) - len(text.lstrip("1"))
+    return b"\0" * pad + n.to_bytes((n.bit_length() + 7) // 8, "big")
+
+
+def b58check_encode(payload: bytes) -> str:
+    return b58encode(payload + sha256d(payload)[:4])
+
+
+def b58check_decode(text: str) -> bytes:
+    data = b58decode(text)
+    if len(data) < 5:
+        raise ValueError("Too short for base58check")
+    payload, checksum = data[:-4], data[-4:]
+    if sha256d(payload)[:4] != checksum:
+        raise ValueError("Invalid checksum")
+    return payload
+
+
+def decode_address(address: str, p2pkh: int, p2sh: int) -> tuple[str, bytes]:
+    """Returns ("p2pkh" | "p2sh", hash160) for a transparent address."""
+    payload = b58check_decode(address)
+    if len(payload) != 22:
+        raise ValueError("Invalid address length")
+    version = int.from_bytes(payload[:2], "big")
+    if version == p2pkh:
+        return "p2pkh", payload[2:]
+    if version == p2sh:
+        return "p2sh", payload[2:]
+    raise ValueError("Address belongs to another network")
+
+
+def encode_address(pubkey_hash: bytes, version: int) -> str:
+    return b58check_encode(version.to_bytes(2, "big") + pubkey_hash)
@@ -1,71 +1,367 @@
 
 import asyncio
+import functools
+import json
+import ssl
+import time
+from collections import OrderedDict, deque
 import aiohttp
+import certifi
+from urllib.parse import urlsplit
 from toga import App
 
 
+SATOSHIS = 100_000_000
+CACHE_SIZE = 1024
+HEIGHT_TTL = 10
+UTXOS_TTL = 5
+PROBE_INTERVAL = 30
+MAX_BACKOFF = 300
+HEDGE_DELAY = 1.0
+LATENCY_SAMPLES = 50
+
+
+BLOCKBOOK_COINS = {"ZEC", "YEC"}
+
+
+@functools.cache
+def default_ssl_context() -> ssl.SSLContext:
+    # Parsing the CA bundle is slow, every per-coin client shares one context.
+    return ssl.create_default_context(cafile=certifi.where())
+
+
 class InsightAPI:
-    def __init__(self, app:App):
+    def __init__(self, app:App, coin: str = None):
         
         self.app = app
-        self.base_url = None
+        self.coin = coin
+        self.endpoints = []
+        self.secondary = []
+        self.stats = {}
+        self.probe_task = None
         self.timeout=aiohttp.ClientTimeout(total=15)
+        self.headers = {'User-Agent': 'Mozilla/5.0'}
+        self.ssl_context = default_ssl_context()
+        self.sessions = {}
+        self.socket_connected = False
+        self.inflight = {}
+        self.cache = OrderedDict()
+
+
+    @property
+    def blockbook(self) -> bool:
+        return (self.coin or self.app.coin) in BLOCKBOOK_COINS
+
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        host = urlsplit(url).netloc
+        session = self.sessions.get(host)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                ssl=self.ssl_context,
+                limit_per_host=4,
+                keepalive_timeout=60,
+                use_dns_cache=True,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=self.timeout
+            )
+            self.sessions[host] = session
+        return session
+
+
+    @property
+    def base_url(self) -> str | None:
+        ranked = self.ranked_endpoints()
+        return ranked[0] if ranked else None
+
+
+    def set_endpoints(self, urls, secondary=()):
+        if isinstance(urls, str):
+            urls = [urls]
+        self.endpoints = [url.rstrip("/") for url in urls]
+        self.secondary = [url.rstrip("/") for url in secondary if url.rstrip("/") not in self.endpoints]
+        for url in self.endpoints + self.secondary:
+            self.stats.setdefault(url, {
+                "latency": None,
+                "samples": deque(maxlen=LATENCY_SAMPLES),
+                "errors": 0.0,
+                "failures": 0,
+                "retry_at": 0.0
+            })
+        if self.probe_task:
+            self.probe_task.cancel()
+            self.probe_task = None
+        if len(self.endpoints) > 1:
+            self.probe_task = asyncio.ensure_future(self.probe_endpoints())
+
+
+    def score(self, url: str) -> float:
+        stats = self.stats[url]
+        latency = stats["latency"] if stats["latency"] is not None else 1.0
+        return latency * (1 + 10 * stats["errors"])
+
+
+    def ranked_endpoints(self) -> list[str]:
+        now = time.monotonic()
+        healthy = [url for url in self.endpoints if self.stats[url]["retry_at"] <= now]
+        demoted = [url for url in self.endpoints if self.stats[url]["retry_at"] > now]
+        healthy.sort(key=self.score)
+        demoted.sort(key=lambda url: self.stats[url]["retry_at"])
+        return healthy + demoted
+
+
+    def record_success(self, url: str, elapsed: float):
+        stats = self.stats[url]
+        if stats["latency"] is None:
+            stats["latency"] = elapsed
+        else:
+            stats["latency"] = 0.8 * stats["latency"] + 0.2 * elapsed
+        stats["samples"].append(elapsed)
+        stats["errors"] *= 0.8
+        stats["failures"] = 0
+        stats["retry_at"] = 0.0
+
+
+    def record_failure(self, url: str):
+        stats = self.stats[url]
+        stats["errors"] = 0.8 * stats["errors"] + 0.2
+        stats["failures"] += 1
+        backoff = min(2 ** stats["failures"], MAX_BACKOFF)
+        stats["retry_at"] = time.monotonic() + backoff
+
+
+    def p95_latency(self, url: str) -> float:
+        samples = sorted(self.stats[url]["samples"])
+        if len(samples) < 5:
+            return HEDGE_DELAY
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+    def attempt_timeout(self, url: str, last: bool) -> aiohttp.ClientTimeout:
+        latency = self.stats[url]["latency"]
+        if last or latency is None:
+            return self.timeout
+        return aiohttp.ClientTimeout(total=min(self.timeout.total, max(3, latency * 4)))
+
+
+    async def probe_endpoints(self):
+        while True:
+            await asyncio.sleep(PROBE_INTERVAL)
+            for url in list(self.endpoints):
+                if self.stats[url]["retry_at"] > time.monotonic():
+                    continue
+                start = time.monotonic()
+                try:
+                    session = self.get_session(url)
+                    async with session.get(f"{url}/status") as resp:
+                        await resp.read()
+                        healthy = resp.status < 500
+                except (asyncio.TimeoutError, aiohttp.ClientError):
+                    healthy = False
+                if healthy:
+                    self.record_success(url, time.monotonic() - start)
+                else:
+                    self.record_failure(url)
+
+
+    async def close(self):
+        if self.probe_task:
+            self.probe_task.cancel()
+            self.probe_task = None
+        sessions = list(self.sessions.values())
+        self.sessions.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+
+
+    def cache_get(self, url: str):
+        entry = self.cache.get(url)
+        if entry is None:
+            return None
+        expires, data = entry
+        if expires <= asyncio.get_running_loop().time():
+            del self.cache[url]
+            return None
+        self.cache.move_to_end(url)
+        return data
 
-    async def _get(self, path: str):
-        url = f"{self.base_url}{path}"
+
+    def cache_set(self, url: str, data, ttl: float):
+        self.cache[url] = (asyncio.get_running_loop().time() + ttl, data)
+        self.cache.move_to_end(url)
+        while len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+
+    def invalidate_cache(self):
+        self.cache.clear()
+
+
+    def cache_key(self, path: str) -> str:
+        return f"{self.endpoints[0]}{path}"
+
+
+    async def _get(self, path: str, ttl: float = 0, hedge: bool = False):
+        if not self.endpoints:
+            return None
+        key = self.cache_key(path)
+        data = self.cache_get(key)
+        if data is not None:
+            return data
+        task = self.inflight.get(key)
+        if task is None:
+            fetch = self._hedged_fetch(path) if hedge else self._fetch(path)
+            task = asyncio.ensure_future(fetch)
+            self.inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self.inflight.pop(key, None))
+        data = await asyncio.shield(task)
+        if data is not None and ttl:
+            self.cache_set(key, data, ttl)
+        return data
+
+
+    async def _request(self, base_url: str, path: str, timeout: aiohttp.ClientTimeout):
+        url = f"{base_url}{path}"
+        start = time.monotonic()
         try:
-            import ssl
-            import certifi
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-            async with aiohttp.ClientSession() as session:
-                headers={'User-Agent': 'Mozilla/5.0'}
-                async with session.get(url, headers=headers, timeout=self.timeout, ssl=ssl_context) as resp:
-                    if resp.status != 200:
-                        return None
-                    return await resp.json()
+            session = self.get_session(url)
+            async with session.get(url, timeout=timeout) as resp:
+                if resp.status < 500:
+                    data = await resp.json() if resp.status == 200 else None
+                    self.record_success(base_url, time.monotonic() - start)
+                    return True, data
         except asyncio.TimeoutError:
             print("API timeout:", url)
         except aiohttp.ClientError as e:
             print("API error:", e)
+        self.record_failure(base_url)
+        return False, None
+
+
+    async def _fetch(self, path: str):
+        ranked = self.ranked_endpoints()
+        for index, base_url in enumerate(ranked):
+            timeout = self.attempt_timeout(base_url, index == len(ranked) - 1)
+            ok, data = await self._request(base_url, path, timeout)
+            if ok:
+                return data
         return None
+
+
+    async def _hedged_fetch(self, path: str):
+        ranked = self.ranked_endpoints()
+        candidates = ranked + [url for url in self.secondary if self.stats[url]["retry_at"] <= time.monotonic()]
+        pending = set()
+        try:
+            for index, base_url in enumerate(candidates):
+                pending.add(asyncio.ensure_future(self._request(base_url, path, self.timeout)))
+                delay = None
+                if index < len(candidates) - 1:
+                    delay = self.p95_latency(base_url)
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        ok, data = task.result()
+                        if ok:
+                            return data
+                    if index < len(candidates) - 1:
+                        break
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
     
     
-    async def get_utxos(self, address: str):
-        blockbook_coins = {"ZEC", "YEC"}
-        if self.app.coin in blockbook_coins:
+    async def get_utxos(self, address: str, hedge: bool = False):
+        if self.blockbook:
             endpoint = f"/utxo/{address}"
         else:
             endpoint = f"/addr/{address}/utxo"
-        return await self._get(endpoint)
+        utxos = await self._get(endpoint, ttl=UTXOS_TTL, hedge=hedge)
+        if not isinstance(utxos, list):
+            return None
+        for u in utxos:
+            if "satoshis" not in u:
+                u["satoshis"] = int(u.get("value", 0))
+            if "amount" not in u:
+                u["amount"] = int(u["satoshis"]) / SATOSHIS
+        return utxos
     
     
-    async def get_address(self, address: str):
-        blockbook_coins = {"ZEC", "YEC"}
-        if self.app.coin in blockbook_coins:
-            endpoint = f"/address/{address}"
-        else:
-            endpoint = f"/addr/{address}"
-        return await self._get(endpoint)
+    async def get_balance(self, address: str) -> dict | None:
+        if self.blockbook:
+            data = await self._get(f"/address/{address}?details=basic")
+            if not data or "balance" not in data:
+                return None
+            return {
+                "balance": int(data.get("balance", 0)) / SATOSHIS,
+                "unconfirmedBalance": int(data.get("unconfirmedBalance", 0)) / SATOSHIS
+            }
+        data = await self._get(f"/addr/{address}?noTxList=1")
+        if data and "balance" in data:
+            return {
+                "balance": float(data.get("balance", 0)),
+                "unconfirmedBalance": float(data.get("unconfirmedBalance", 0))
+            }
+        confirmed = await self._get(f"/addr/{address}/balance")
+        if confirmed is None:
+            return None
+        unconfirmed = await self._get(f"/addr/{address}/unconfirmedBalance")
+        return {
+            "balance": int(confirmed) / SATOSHIS,
+            "unconfirmedBalance": int(unconfirmed or 0) / SATOSHIS
+        }
     
     
-    async def get_transactions(self, address: str):
-        blockbook_coins = {"ZEC", "YEC"}
-        if self.app.coin in blockbook_coins:
-            endpoint = f"/address/{address}/txs"
-        else:
-            endpoint = f"/txs/?address={address}"
-        data = await self._get(endpoint)
-        if not data:
-            return []
-        return data.get("txs", [])
+    async def iter_transactions(self, address: str, known=None, page_size: int = 50):
+        blockbook = self.blockbook
+        page = 1 if blockbook else 0
+        while True:
+            if blockbook:
+                endpoint = f"/address/{address}?details=txs&page={page}&pageSize={page_size}"
+            else:
+                endpoint = f"/txs/?address={address}&pageNum={page}"
+            data = await self._get(endpoint)
+            if not data:
+                return
+            if blockbook:
+                txs = data.get("transactions") or data.get("txs") or []
+                last_page = data.get("totalPages", page)
+            else:
+                txs = data.get("txs", [])
+                last_page = data.get("pagesTotal", 1) - 1
+            if known and txs:
+                stored = await known([tx.get("txid") for tx in txs])
+                for index, tx in enumerate(txs):
+                    if tx.get("txid") in stored:
+                        if index:
+                            yield txs[:index]
+                        return
+            if txs:
+                yield txs
+            if not txs or page >= last_page:
+                return
+            page += 1
     
 
-    async def get_transaction(self, txid: str):
-        return await self._get(f"/tx/{txid}")
-    
-    
-    async def get_block_height(self) -> int | None:
-        data = await self._get("/status")
+    async def get_block_hash(self, height: int) -> str | None:
+        data = await self._get(f"/block-index/{height}")
+        if not data:
+            return None
+        return data.get("blockHash")
+
+
+    async def get_block_height(self, hedge: bool = False) -> int | None:
+        data = await self._get("/status", ttl=HEIGHT_TTL, hedge=hedge)
         if not data:
             return None
         blocks = data.get("info", {}).get("blocks")
@@ -78,38 +374,134 @@ class InsightAPI:
         return None
 
 
-    async def broadcast_tx(self, raw_tx: str) -> tuple[bool, str | None]:
-        blockbook_coins = {"ZEC", "YEC"}
+    async def _broadcast(self, base_url: str, raw_tx: str) -> tuple[bool, str | None]:
         try:
-            import ssl
-            import certifi
-            ssl_context = ssl.create_default_context(cafile=certifi.where())
-            async with aiohttp.ClientSession() as session:
-                headers = {'User-Agent': 'Mozilla/5.0'}
-
-                if self.app.coin in blockbook_coins:
-                    url = f"{self.base_url}/sendtx"
-                    payload = {"hex": raw_tx}
-                    async with session.post(url, headers=headers, json=payload, timeout=self.timeout, ssl=ssl_context) as resp:
-                        data = await resp.json()
-                        if resp.status == 200 and "result" in data:
-                            return True, data["result"]
-                        text = await resp.text()
-                        return False, f"Node returned {resp.status}: {text}"
-                else:
-                    url = f"{self.base_url}/tx/send"
-                    payload = {"rawtx": raw_tx}
-                    async with session.post(url, headers=headers, json=payload, timeout=self.timeout, ssl=ssl_context) as resp:
-                        text = await resp.text()
-                        if resp.status == 200:
-                            return True, None
-                        return False, f"Node returned {resp.status}: {text}"
+            if self.blockbook:
+                url = f"{base_url}/sendtx"
+                payload = {"hex": raw_tx}
+                session = self.get_session(url)
+                async with session.post(url, json=payload) as resp:
+                    data = await resp.json()
+                    if resp.status == 200 and "result" in data:
+                        return True, data["result"]
+                    text = await resp.text()
+                    return False, f"Node returned {resp.status}: {text}"
+            else:
+                url = f"{base_url}/tx/send"
+                payload = {"rawtx": raw_tx}
+                session = self.get_session(url)
+                async with session.post(url, json=payload) as resp:
+                    text = await resp.text()
+                    if resp.status == 200:
+                        return True, None
+                    return False, f"Node returned {resp.status}: {text}"
 
+        except asyncio.TimeoutError:
+            return False, f"Network timeout: {base_url}"
         except aiohttp.ClientError as e:
             return False, f"Network error: {e}"
 
 
+    async def broadcast_tx(self, raw_tx: str) -> tuple[bool, str | None]:
+        self.invalidate_cache()
+        targets = self.ranked_endpoints() + self.secondary
+        if not targets:
+            return False, "No explorer endpoint configured"
+        pending = {asyncio.ensure_future(self._broadcast(url, raw_tx)) for url in targets}
+        first_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    success, result = task.result()
+                    if success:
+                        return True, result
+                    first_error = first_error or result
+            return False, first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+    def socket_url(self) -> str:
+        parts = urlsplit(self.base_url)
+        scheme = "wss" if parts.scheme == "https" else "ws"
+        if self.blockbook:
+            return f"{scheme}://{parts.netloc}/websocket"
+        return f"{scheme}://{parts.netloc}/socket.io/?EIO=3&transport=websocket"
+
+
+    async def subscribe(self, address: str, on_block, on_address):
+        blockbook = self.blockbook
+        delay = 1
+        while True:
+            url = self.socket_url()
+            try:
+                session = self.get_session(url)
+                async with session.ws_connect(url, heartbeat=30 if blockbook else None) as ws:
+                    if blockbook:
+                        await self._blockbook_socket(ws, address, on_block, on_address)
+                    else:
+                        await self._insight_socket(ws, address, on_block, on_address)
+                delay = 1
+            except asyncio.CancelledError:
+                self.socket_connected = False
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print("Socket error:", e)
+            self.socket_connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
 
 
+    async def _insight_socket(self, ws, address, on_block, on_address):
+        ping_interval = 25
+        msg = await ws.receive(timeout=15)
+        if msg.type != aiohttp.WSMsgType.TEXT or not msg.data.startswith("0"):
+            raise ValueError("Unexpected socket.io handshake")
+        handshake = json.loads(msg.data[1:])
+        ping_interval = handshake.get("pingInterval", 25000) / 1000
+        await ws.send_str('42["subscribe","inv"]')
+        await ws.send_str("42" + json.dumps(["subscribe", "bitcoind/addresstxid", [address]]))
+        self.socket_connected = True
+        on_block(None)
+        # Pings follow the clock, a busy inv stream must not hold them back.
+        last_ping = time.monotonic()
+        while True:
+            if time.monotonic() - last_ping >= ping_interval:
+                await ws.send_str("2")
+                last_ping = time.monotonic()
+            try:
+                msg = await ws.receive(timeout=last_ping + ping_interval - time.monotonic())
+            except asyncio.TimeoutError:
+                continue
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                return
+            if msg.data == "2":
+                await ws.send_str("3")
+                continue
+            if not msg.data.startswith("42"):
+                continue
+            event, *payload = json.loads(msg.data[2:])
+            if event == "block":
+                on_block(payload[0] if payload else None)
+            elif event == "bitcoind/addresstxid" and payload:
+                on_address(payload[0].get("txid"))
 
 
+    async def _blockbook_socket(self, ws, address, on_block, on_address):
+        await ws.send_json({"id": "block", "method": "subscribeNewBlock", "params": {}})
+        await ws.send_json({"id": "address", "method": "subscribeAddresses", "params": {"addresses": [address]}})
+        self.socket_connected = True
+        on_block(None)
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                return
+            message = json.loads(msg.data)
+            data = message.get("data") or {}
+            if data.get("subscribed") is not None:
+                continue
+            if message.get("id") == "block":
+                on_block(data.get("height"))
+            elif message.get("id") == "address":
+                on_address(data.get("tx", {}).get("txid"))
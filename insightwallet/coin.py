@@ -1,22 +1,30 @@
 
 import asyncio
-import subprocess
-from datetime import datetime, timezone
-import json
+import csv
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
-from toga import App, Box, ImageView, Button, Label, Table, TextInput, OptionContainer, OptionItem, Divider, ProgressBar, PasswordInput
+from toga import App, Box, ImageView, Button, Label, Table, TextInput, OptionContainer, OptionItem, Divider, ProgressBar, PasswordInput, Switch
 from toga.constants import COLUMN, ROW, CENTER, BOLD, ITALIC, Direction, END
 from toga.style.pack import Pack
 from toga.colors import RED, GRAY, GREEN
 from toga.platform import current_platform
 
+from . import coinselect, transaction
+from .tasks import TaskSupervisor
+from .address import b58check_decode, decode_address
+
 
 SATOSHIS = 100_000_000
 FEE_RATE = 1
+HISTORY_PAGE = 100
+CHAIN_DEPTH = 10
+CONFIRMATIONS = 6
+TABLE_BATCH = 10
 
 
 class Coin(Box):
-    def __init__(self, app:App, address):
+    def __init__(self, app:App, coin, address):
         super().__init__(
             style=Pack(
                 direction=COLUMN,
@@ -26,16 +34,23 @@ class Coin(Box):
         )
 
         self.app = app
+        self.coin = coin
         self.address = address
+        self.api = self.app.sync.get_api(coin)
 
-        coin_info = self.app.utils.get_coin(self.app.coin)
+        coin_info = self.app.utils.get_coin(coin)
+        self.coin_info = coin_info
         self.name = coin_info["name"]
         self.network = coin_info["network"]
-        self.app.api.base_url = coin_info["api"].rstrip("/")
 
-        self.transactions_data = []
+        self.transaction_rows = {}
+        self.recent_transactions = {}
+        self.history_cursor = None
+        self.newest_timestamp = None
+        self.loading_history = False
         self.current_height = 0
-        self.toggle = True
+        self.tasks = TaskSupervisor()
+        self.consolidation = None
 
         if current_platform == "linux":
             amount_label_style = Pack(
@@ -61,7 +76,7 @@ class Coin(Box):
             )
 
         self.coin_logo = ImageView(
-            image=f"resources/{self.app.coin}.png",
+            image=f"resources/{self.coin}.png",
             style=Pack(
                 width=50,
                 margin_left=10,
@@ -221,7 +236,10 @@ class Coin(Box):
                 font_size=12,
                 width=500,
                 margin_top=10
-            )
+            ),
+            validators=[
+                self.address_error
+            ]
         )
 
         self.destination_box = Box(
@@ -298,6 +316,22 @@ class Coin(Box):
             )
         )
 
+        self.chain_switch = Switch(
+            text="Spend unconfirmed change",
+            style=Pack(
+                font_size=10,
+                margin_left=115
+            )
+        )
+
+        self.chain_box = Box(
+            style=Pack(
+                direction=ROW,
+                align_items=CENTER,
+                margin=10
+            )
+        )
+
         self.send_button = Button(
             text="Broadcast",
             style=Pack(
@@ -310,6 +344,29 @@ class Coin(Box):
             on_press=self.verify_inputs
         )
 
+        self.batch_button = Button(
+            text="Batch",
+            style=Pack(
+                width=80,
+                font_size=12,
+                margin_left=10,
+                margin_bottom=20
+            ),
+            on_press=self.batch_payout,
+            enabled=False
+        )
+
+        self.consolidate_button = Button(
+            text="Consolidate",
+            style=Pack(
+                width=110,
+                font_size=12,
+                margin_left=10,
+                margin_bottom=20
+            ),
+            on_press=self.consolidate_utxos
+        )
+
         self.send_progress = ProgressBar(
             max=100,
             style=Pack(
@@ -488,6 +545,7 @@ class Coin(Box):
             self.destination_box,
             self.amount_box,
             self.fee_box,
+            self.chain_box,
             self.send_buttons
         )
         self.destination_box.add(
@@ -500,13 +558,18 @@ class Coin(Box):
             self.max_button
         )
         self.send_buttons.add(
-            self.send_button
+            self.send_button,
+            self.batch_button,
+            self.consolidate_button
         )
         self.fee_box.add(
             self.fee_label,
             self.fee_input,
             self.calcul_button
         )
+        self.chain_box.add(
+            self.chain_switch
+        )
 
         self.redeem_page.add(
             self.key_box,
@@ -522,7 +585,7 @@ class Coin(Box):
         )
 
         self.set_table_context_menu()
-        self.app.loop.create_task(self.load_transactions())
+        self.set_table_scroll_handler()
 
 
     def set_table_context_menu(self):
@@ -552,10 +615,25 @@ class Coin(Box):
             tree.connect("button-press-event", on_button_press)
 
 
+    def set_table_scroll_handler(self):
+        platfrom = current_platform
+        if platfrom == "windows":
+            def on_retrieve_item(sender, event):
+                if event.ItemIndex >= len(self.transaction_table.data) - 10:
+                    self.tasks.spawn(self.load_more_transactions(), "more")
+            self.transaction_table._impl.native.RetrieveVirtualItem += on_retrieve_item
+        elif platfrom == "linux":
+            adjustment = self.transaction_table._impl.native.get_vadjustment()
+            def on_scroll(adjustment):
+                page = adjustment.get_page_size()
+                if adjustment.get_value() + page >= adjustment.get_upper() - page:
+                    self.tasks.spawn(self.load_more_transactions(), "more")
+            adjustment.connect("value-changed", on_scroll)
+
+
     def open_in_explorer(self, *args):
-        url = self.app.api.base_url.rstrip("/")
-        blockbook_coins = {"ZEC", "YEC"}
-        if self.app.coin in blockbook_coins:
+        url = self.api.base_url.rstrip("/")
+        if self.api.blockbook:
             url = url.rstrip("/api") + "/api/v2"
         elif url.endswith("/api"):
             url = url[:-4]
@@ -572,113 +650,187 @@ class Coin(Box):
             m, paths = selection.get_selected_rows()
             indices = [path.get_indices()[0] for path in paths]
         for index in indices:
-            txid = self.transactions_data[index]
+            txid = self.transaction_table.data[index].txid
             full_url = url + "/tx/" + txid
             import webbrowser
             webbrowser.open(full_url)
 
 
     async def load_transactions(self):
-        transactions = self.app.vault.get_transactions(self.app.account, self.app.password, self.app.coin)
-        transactions.sort(key=lambda tx: tx.get("timestamp", 0), reverse=True)
-        for tx in transactions:
-            tx_type = tx.get('type')
-            txid = tx.get('txid')
-            amount = tx.get('amount')
-            timestamp = tx.get('timestamp')
-            amount = self.app.utils.format_balance(amount)
-            timestamp = datetime.fromtimestamp(int(timestamp)).strftime("%Y-%m-%d %H:%M:%S")
-            data = {"type": tx_type.upper(), "txid": txid, "amount": amount, "timestamp": timestamp}
-            self.transaction_table.data.append(data)
-            self.transactions_data.append(txid)
-
-        self.transaction_page.add(self.transaction_table)
-        self.transaction_table.style.flex = 1
-        self.app.loop.create_task(self.fetch_network_info())
-
-
-    async def fetch_network_info(self):
-        while True:
-            if not self.toggle:
-                return
-            blocks = await self.app.api.get_block_height()
-            if blocks:
-                self.blocks_label.text = f"Height : {blocks}"
-                if self.current_height < blocks:
-                    self.app.loop.create_task(self.fetch_transactions())
-                self.current_height = blocks
-            addr_info = await self.app.api.get_address(self.address)
-            if addr_info:
-                confirmed = addr_info.get("balance", 0)
-                unconfirmed = addr_info.get("unconfirmedBalance", 0)
-                if float(unconfirmed) > 0:
-                    self.unconfirmed_label.text = f"Unconf. : +{self.app.utils.format_balance(unconfirmed)}"
-                    self.unconfirmed_label.style.color = GREEN
-                elif float(unconfirmed) < 0:
-                    self.unconfirmed_label.text = f"Unconf. : -{self.app.utils.format_balance(abs(unconfirmed))}"
-                    self.unconfirmed_label.style.color = RED
-                else:
-                    self.unconfirmed_label.text = "Unconf. : 0.00000000"
-                    self.unconfirmed_label.style.color = GRAY
-                spendable = float(confirmed)
-                if float(unconfirmed) < 0:
-                    spendable += float(unconfirmed)
-                spendable = max(spendable, 0)
-                self.balance_label.text = f"Balance : {self.app.utils.format_balance(spendable)}"
-
-            await asyncio.sleep(15)
-
-
-    def classify_tx(self, tx: dict, address: str):
-        sent = 0.0
-        received = 0.0
-        for vin in tx.get("vin", []):
-            if vin.get("addr") == address:
-                sent += float(vin.get("value", 0))
-
-        for vout in tx.get("vout", []):
-            spk = vout.get("scriptPubKey", {})
-            addresses = spk.get("addresses", [])
-            if address in addresses:
-                received += float(vout.get("value", 0))
-        net = received - sent
-        if net > 0:
-            return "receive", net
-        elif net < 0:
-            return "send", abs(net)
-        else:
-            return None, 0
-        
+        if self.transaction_table not in self.transaction_page.children:
+            await self.render_transactions()
+            self.transaction_page.add(self.transaction_table)
+            self.transaction_table.style.flex = 1
+        self.app.sync.attach(self.coin, self)
+        if current_platform == "darwin":
+            while self.history_cursor is not None:
+                await self.load_more_transactions()
+                await asyncio.sleep(0.5)
+
 
-    def get_tx_timestamp(self, tx: dict) -> int:
-        if tx.get("time"):
-            return int(tx["time"])
-        if tx.get("blocktime"):
-            return int(tx["blocktime"])
-        return int(datetime.now(timezone.utc).timestamp())
-
-
-    async def fetch_transactions(self):
-        transactions = await self.app.api.get_transactions(self.address)
-        transactions.sort(
-            key=lambda tx: self.get_tx_timestamp(tx),
-            reverse=True
-        )
-        for tx in transactions:
-            txid = tx.get("txid")
-            if txid not in self.transactions_data:
-                tx_type, amount = self.classify_tx(tx, self.address)
-                if not tx_type:
-                    continue
-                timestamp = self.get_tx_timestamp(tx)
-                self.app.vault.add_transaction(
-                    self.app.account, self.app.password, self.app.coin, tx_type, txid, amount, timestamp
+    async def render_transactions(self):
+        transactions = await self.app.session.get_transactions(self.coin, limit=HISTORY_PAGE)
+        self.transaction_rows.clear()
+        self.recent_transactions.clear()
+        self.append_transactions(transactions, replace=True)
+
+
+    async def load_more_transactions(self):
+        if self.loading_history or self.history_cursor is None:
+            return
+        self.loading_history = True
+        try:
+            # A page of rows already shown adds nothing, read on to the next one.
+            while self.history_cursor is not None:
+                transactions = await self.app.session.get_transactions(
+                    self.coin, limit=HISTORY_PAGE, before=self.history_cursor
                 )
-                amount = self.app.utils.format_balance(amount)
-                timestamp = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
-                data = {"type": tx_type.upper(), "txid": txid, "amount": amount, "timestamp": timestamp}
-                self.transaction_table.data.insert(0, data)
-                self.transactions_data.insert(0, txid)
+                if self.append_transactions(transactions):
+                    break
+        finally:
+            self.loading_history = False
+
+
+    def append_transactions(self, transactions, replace: bool = False):
+        if len(transactions) < HISTORY_PAGE:
+            self.history_cursor = None
+        else:
+            last = transactions[-1]
+            self.history_cursor = (last["timestamp"], last["id"])
+        data = [self.table_row(tx) for tx in transactions if tx["txid"] not in self.transaction_rows]
+        if replace:
+            self.newest_timestamp = transactions[0]["timestamp"] if transactions else None
+            self.set_table_rows(data)
+        elif data:
+            self.set_table_rows(self.shown_rows() + data)
+        return len(data)
+
+
+    def table_row(self, tx: dict) -> dict:
+        txid = tx["txid"]
+        height = tx.get("height")
+        if self.is_recent(height):
+            self.recent_transactions[txid] = (tx["type"], height)
+        amount = self.app.utils.format_balance(tx["amount"] / SATOSHIS)
+        timestamp = datetime.fromtimestamp(int(tx["timestamp"])).strftime("%Y-%m-%d %H:%M:%S")
+        return {"type": self.type_label(tx["type"], height), "txid": txid, "amount": amount, "timestamp": timestamp}
+
+
+    def set_table_rows(self, data):
+        # Replacing the source redraws the table once instead of once per row.
+        self.transaction_table.data = data
+        self.transaction_rows = {row.txid: row for row in self.transaction_table.data}
+
+
+    def shown_rows(self) -> list[dict]:
+        return [
+            {key: getattr(row, key) for key in ("type", "txid", "amount", "timestamp")}
+            for row in self.transaction_table.data
+        ]
+
+
+    def is_recent(self, height) -> bool:
+        if height is None or not self.current_height:
+            return True
+        return self.current_height - height + 1 < CONFIRMATIONS
+
+
+    def type_label(self, tx_type, height) -> str:
+        if height is None:
+            return f"{tx_type.upper()} (0 conf.)"
+        if not self.current_height or self.current_height - height + 1 >= CONFIRMATIONS:
+            return tx_type.upper()
+        return f"{tx_type.upper()} ({self.current_height - height + 1} conf.)"
+
+
+    def update_confirmations(self):
+        for txid, (tx_type, height) in list(self.recent_transactions.items()):
+            row = self.transaction_rows.get(txid)
+            label = self.type_label(tx_type, height)
+            if row is not None and row.type != label:
+                row.type = label
+            if not self.is_recent(height):
+                del self.recent_transactions[txid]
+
+
+    def on_height(self, height):
+        self.blocks_label.text = f"Height : {height}"
+        if self.current_height and self.current_height < height and self.consolidation:
+            self.tasks.spawn(self.consolidate_next(), "consolidate")
+        self.current_height = height
+        self.update_confirmations()
+
+
+    def on_balance(self, addr_info):
+        confirmed = addr_info.get("balance", 0)
+        unconfirmed = addr_info.get("unconfirmedBalance", 0)
+        if float(unconfirmed) > 0:
+            self.unconfirmed_label.text = f"Unconf. : +{self.app.utils.format_balance(unconfirmed)}"
+            self.unconfirmed_label.style.color = GREEN
+        elif float(unconfirmed) < 0:
+            self.unconfirmed_label.text = f"Unconf. : -{self.app.utils.format_balance(abs(unconfirmed))}"
+            self.unconfirmed_label.style.color = RED
+        else:
+            self.unconfirmed_label.text = "Unconf. : 0.00000000"
+            self.unconfirmed_label.style.color = GRAY
+        spendable = float(confirmed)
+        if float(unconfirmed) < 0:
+            spendable += float(unconfirmed)
+        spendable = max(spendable, 0)
+        self.balance_label.text = f"Balance : {self.app.utils.format_balance(spendable)}"
+
+
+    def on_transactions(self, rows):
+        # The last row of a txid wins, then rows are laid out newest first.
+        rows = sorted({row["txid"]: row for row in rows}.values(), key=lambda row: row["timestamp"], reverse=True)
+        new_rows = []
+        skipped = None
+        for row in rows:
+            txid = row["txid"]
+            if txid in self.transaction_rows:
+                if txid in self.recent_transactions:
+                    self.recent_transactions[txid] = (row["type"], row["height"])
+                continue
+            if self.newest_timestamp is not None and row["timestamp"] < self.newest_timestamp:
+                skipped = max(skipped or 0, row["timestamp"])
+                continue
+            new_rows.append(self.table_row(row))
+        if new_rows:
+            self.newest_timestamp = max(self.newest_timestamp or 0, rows[0]["timestamp"])
+        # Only rows newer than the table are inserted, older ones are left to
+        # paging, which reads them back from the vault below this cursor.
+        if skipped is not None:
+            cursor = (skipped + 1, 0)
+            if self.history_cursor is None or cursor > self.history_cursor:
+                self.history_cursor = cursor
+        self.update_confirmations()
+        if len(new_rows) > TABLE_BATCH:
+            self.set_table_rows(new_rows + self.shown_rows())
+            return
+        for position, row in enumerate(new_rows):
+            self.transaction_rows[row["txid"]] = self.transaction_table.data.insert(position, row)
+
+
+    def on_history_reset(self):
+        self.tasks.spawn(self.render_transactions(), "render")
+
+
+    def attach(self):
+        self.tasks.spawn(self.load_transactions(), "load")
+        self.tasks.spawn(self.check_batch_support(), "batch")
+
+
+    async def check_batch_support(self):
+        # Multiple outputs are only built by a wallet-cli that runs with --serve.
+        supported = self.app.worker.serve_supported
+        if supported is None:
+            supported = await self.app.worker.start()
+        self.batch_button.enabled = supported and self.send_button.enabled
+
+
+    def detach(self, park: bool = True):
+        self.app.sync.detach(self.coin, self, park)
+        self.tasks.cancel()
 
 
     def copy_address(self, button):
@@ -686,13 +838,11 @@ class Coin(Box):
 
 
     def export_key(self, button):
-        def on_result(widget, path):
+        async def on_result(widget, path):
             if not path:
                 return
-            success = self.app.vault.export_coin_data(
-                account=self.app.account,
-                password=self.app.password,
-                coin=self.app.coin,
+            success = await self.app.session.export_coin_data(
+                coin=self.coin,
                 output_path=path
             )
             if not success:
@@ -703,14 +853,14 @@ class Coin(Box):
                 return
             self.app.main_window.info_dialog(
                 "Export complete",
-                f"{self.app.coin} data was successfully exported\n{path}"
+                f"{self.coin} data was successfully exported\n{path}"
             )
         def on_confirm(widget, result):
             if result is False:
                 return
             self.app.main_window.save_file_dialog(
                 "Export coin",
-                f"{self.app.account}_{self.app.coin}_export",
+                f"{self.app.account}_{self.coin}_export",
                 file_types=["txt"],
                 on_result=on_result
             )
@@ -723,6 +873,20 @@ class Coin(Box):
         )
 
 
+    def address_error(self, address):
+        # Checked locally against the coin's version prefixes, no explorer lookup.
+        if not address:
+            return None
+        try:
+            if "p2pkh" in self.coin_info:
+                decode_address(address.strip(), int(self.coin_info["p2pkh"], 16), int(self.coin_info["p2sh"], 16))
+            elif len(b58check_decode(address.strip())) != 22:
+                return "Invalid address length"
+        except ValueError as e:
+            return str(e)
+        return None
+
+
     def is_digit(self, value):
         if not self.amount_input.value.replace('.', '', 1).isdigit():
             self.amount_input.value = ""
@@ -735,6 +899,7 @@ class Coin(Box):
         self.send_progress.value = 5
         self.send_button.text = "Sending..."
         self.send_button.enabled = False
+        self.batch_button.enabled = False
         self.destination_input.readonly = True
         self.amount_input.readonly = True
         self.fee_input.readonly = True
@@ -747,78 +912,100 @@ class Coin(Box):
         self.amount_input.readonly = False
         self.fee_input.readonly = False
         self.send_button.enabled = True
+        self.batch_button.enabled = self.app.worker.serve_supported is True
 
 
-    async def build_transaction(self, wif, inputs_to_use, destination, amount_sat, fee_sat):
+    async def build_transaction(self, wif, inputs_to_use, outputs, fee_sat):
         if not wif:
             return None, "Failed to unlock private key"
         self.send_progress.value = 10
         network = self.name.lower()
-        wallet_cli = str(self.app.utils.get_tool())
         utxos = [
             {
                 "txid": u["txid"],
                 "vout": int(u["vout"]),
-                "satoshis": int(round(float(u["amount"]) * 100_000_000))
+                "satoshis": int(u["satoshis"])
             }
             for u in inputs_to_use
         ]
-        block_height = await self.app.api.get_block_height()
-        cmd = [
-            wallet_cli,
-            "--network", network,
-            "--wif", wif,
-            "--to", destination,
-            "--amount", str(amount_sat),
-            "--fee", str(fee_sat),
-            "--utxos", json.dumps(utxos),
-            "--blockheight", str(block_height)
-        ]
-        try:
-            creationflags = subprocess.CREATE_NO_WINDOW if current_platform == "windows" else 0
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=creationflags
-            )
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                return None, stderr.decode().strip() or "Transaction build failed"
-            raw_tx_hex = stdout.decode().strip()
-            if not raw_tx_hex or len(raw_tx_hex) < 20:
-                return None, "Invalid raw transaction returned"
-            self.send_progress.value = 50
-            return raw_tx_hex, None
-        except Exception as e:
-            return None, f"Transaction build error: {e}"
+        block_height = await self.api.get_block_height(hedge=True)
+        if not block_height:
+            return None, "Unable to fetch block height"
+        if len(outputs) == 1:
+            destination, amount_sat = outputs[0]
+            params = dict(to=destination, amount=amount_sat)
+        else:
+            params = dict(outputs=[{"address": a, "satoshis": s} for a, s in outputs])
+        raw_tx_hex, error = await self.app.worker.call(
+            "build_transaction",
+            network=network,
+            wif=wif,
+            fee=fee_sat,
+            utxos=utxos,
+            blockheight=block_height,
+            **params
+        )
+        if error:
+            return None, f"Transaction build error: {error}"
+        if not raw_tx_hex or len(raw_tx_hex) < 20:
+            return None, "Invalid raw transaction returned"
+        self.send_progress.value = 50
+        return raw_tx_hex, None
         
 
+    async def get_spendable_utxos(self):
+        tip = self.current_height or await self.api.get_block_height(hedge=True)
+        utxos = await self.app.session.get_utxos(self.coin, tip or 0)
+        if not utxos:
+            utxos = await self.api.get_utxos(self.address, hedge=True)
+        return utxos
+
+
+    async def spendable_inputs(self):
+        utxos = await self.get_spendable_utxos()
+        if not utxos:
+            return []
+        chainable = set()
+        if self.chain_switch.value:
+            chainable = await self.app.session.chainable_txids(self.coin, CHAIN_DEPTH)
+        return [u for u in utxos if u.get("confirmations", 0) > 0 or u["txid"] in chainable]
+
+
+    async def record_broadcast(self, raw_tx_hex, inputs):
+        try:
+            tx = transaction.parse_transaction(raw_tx_hex)
+        except ValueError:
+            return
+        own_script = transaction.p2pkh_script(b58check_decode(self.address)[2:])
+        created = [
+            (tx["txid"], n, satoshis, None)
+            for n, (satoshis, script) in enumerate(tx["outputs"])
+            if script == own_script
+        ]
+        spent = [(u["txid"], int(u["vout"]), int(u["satoshis"]), tx["txid"]) for u in inputs]
+        await self.app.session.add_pending_tx(self.coin, tx["txid"], tx["expiry_height"], spent, created)
+
+
     async def min_fee(self, amount_sat):
-        utxos = await self.app.api.get_utxos(self.address)
+        utxos = await self.spendable_inputs()
         if not utxos:
             return None, None
-        utxos.sort(key=lambda u: u.get("confirmations", 0), reverse=True)
-        total_input = 0
-        inputs_count = 0
-        outputs_count = 1
-        fee_sat = 0
-        def estimate_tx_size(inputs, outputs):
-            return 10 + inputs * 148 + outputs * 34
-        for u in utxos:
-            if u.get("confirmations", 0) <= 0:
-                continue
-            value_sat = int(round(float(u["amount"]) * SATOSHIS))
-            total_input += value_sat
-            inputs_count += 1
-            fee_sat = estimate_tx_size(inputs_count, outputs_count) * FEE_RATE
-            if total_input >= amount_sat + fee_sat:
-                break
-        return total_input, fee_sat
+        values = [int(u["satoshis"]) for u in utxos]
+        selection = (
+            coinselect.select(values, amount_sat, FEE_RATE)
+            or coinselect.select_all(values, FEE_RATE)
+        )
+        if not selection:
+            return None, None
+        return selection["total"], selection["fee"]
         
 
     async def max_amount(self, button):
-        addr_info = await self.app.api.get_address(self.address)
+        spendable_sat = await self.app.session.get_spendable_balance(self.coin)
+        if spendable_sat > 0:
+            self.amount_input.value = self.app.utils.format_balance(spendable_sat / SATOSHIS)
+            return
+        addr_info = await self.api.get_balance(self.address)
         if not addr_info:
             return
         confirmed = addr_info.get("balance", 0)
@@ -875,58 +1062,46 @@ class Coin(Box):
                 "Error", "Amount and fee must be greater than zero"
             )
             return
-        self.disable_send()
-        addr_info = await self.app.api.get_address(destination)
-        if not addr_info:
+        address_error = self.address_error(destination)
+        if address_error:
             self.app.main_window.error_dialog(
-                "Error", "Invalid destination address"
+                "Error", f"Invalid destination address: {address_error}"
             )
-            self.enable_send()
+            self.destination_input.focus()
             return
-        utxos = await self.app.api.get_utxos(self.address)
+        self.disable_send()
+        utxos = await self.spendable_inputs()
         if not utxos:
             self.app.main_window.error_dialog(
                 "Error", "No UTXOs available"
             )
             self.enable_send()
             return
-        utxos.sort(key=lambda u: u.get("confirmations", 0), reverse=True)
-        total_input = 0
-        inputs_to_use = []
-        for u in utxos:
-            if u.get("confirmations", 0) <= 0:
-                continue
-            value_sat = int(round(float(u["amount"]) * 100_000_000))
-            inputs_to_use.append(u)
-            total_input += value_sat
-            if total_input >= amount_sat + fee_sat:
-                break
-        if total_input < amount_sat + fee_sat:
+        selection = coinselect.select([int(u["satoshis"]) for u in utxos], amount_sat, fee=fee_sat)
+        if not selection:
             self.app.main_window.error_dialog(
-                "Error", f"Not enough {self.app.coin} for amount + fee"
+                "Error", f"Not enough {self.coin} for amount + fee"
             )
             self.enable_send()
             return
-        wif = self.app.vault.get_coin_wif(
-            self.app.account,
-            self.app.password,
-            self.app.coin
-        )
-        raw_tx_hex, error = await self.build_transaction(wif, inputs_to_use, destination, amount_sat, fee_sat)
+        inputs_to_use = [utxos[i] for i in selection["inputs"]]
+        wif = await self.app.session.get_coin_wif(self.coin)
+        raw_tx_hex, error = await self.build_transaction(wif, inputs_to_use, [(destination, amount_sat)], fee_sat)
         if error:
             self.app.main_window.error_dialog(
                 "Error", error
             )
             self.enable_send()
             return
-        success, error = await self.app.api.broadcast_tx(raw_tx_hex)
+        success, error = await self.api.broadcast_tx(raw_tx_hex)
         if success:
+            await self.record_broadcast(raw_tx_hex, inputs_to_use)
             async def on_result(widget, result):
                 self.destination_input.value = ""
                 self.amount_input.value = ""
                 self.fee_input.value = ""
                 self.enable_send()
-                await self.fetch_transactions()
+                self.app.sync.request_sync(self.coin, history=True)
             self.send_progress.value = 100
             self.app.main_window.info_dialog(
                 "Success", "Transaction broadcast successfully",
@@ -939,6 +1114,203 @@ class Coin(Box):
             self.enable_send()
         
 
+    def read_payouts(self, path):
+        payouts = []
+        try:
+            with open(path, newline="") as f:
+                for line, row in enumerate(csv.reader(f), 1):
+                    if not row or not "".join(row).strip():
+                        continue
+                    if len(row) < 2:
+                        return None, f"Line {line}: expected address,amount"
+                    address, amount = row[0].strip(), row[1].strip()
+                    try:
+                        value = Decimal(amount) * SATOSHIS
+                    except InvalidOperation:
+                        if line == 1:
+                            continue
+                        return None, f"Line {line}: invalid amount {amount}"
+                    if not value.is_finite() or value <= 0 or value != int(value):
+                        return None, f"Line {line}: invalid amount {amount}"
+                    address_error = self.address_error(address)
+                    if address_error or not address:
+                        return None, f"Line {line}: {address} ({address_error or 'missing address'})"
+                    payouts.append((address, int(value)))
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            return None, str(e)
+        if not payouts:
+            return None, "No payouts found"
+        return payouts, None
+
+
+    def batch_payout(self, button):
+        self.app.main_window.open_file_dialog(
+            "Batch payout",
+            file_types=["csv"],
+            on_result=self.on_batch_file
+        )
+
+
+    async def on_batch_file(self, widget, path):
+        if not path:
+            return
+        payouts, error = self.read_payouts(path)
+        if error:
+            self.app.main_window.error_dialog(
+                "Error", error
+            )
+            return
+        utxos = await self.spendable_inputs()
+        batches = coinselect.select_batches(
+            [int(u["satoshis"]) for u in utxos],
+            [amount for _, amount in payouts],
+            FEE_RATE
+        )
+        if not batches:
+            self.app.main_window.error_dialog(
+                "Error", f"Not enough {self.coin} for {len(payouts)} payouts + fee"
+            )
+            return
+        total = sum(amount for _, amount in payouts)
+        fees = sum(batch["fee"] for batch in batches)
+        async def on_confirm(widget, result):
+            if result:
+                await self.send_batches(utxos, payouts, batches)
+        self.app.main_window.confirm_dialog(
+            "Batch payout",
+            f"Payouts : {len(payouts)} in {len(batches)} transaction(s)\n"
+            f"Total : {self.app.utils.format_balance(total / SATOSHIS)} {self.coin}\n"
+            f"Fees : {self.app.utils.format_balance(fees / SATOSHIS)} {self.coin}\n"
+            f"Fee per payout : {self.app.utils.format_balance(fees / len(payouts) / SATOSHIS)} {self.coin}\n\n"
+            "Do you want to broadcast ?",
+            on_result=on_confirm
+        )
+
+
+    async def send_batches(self, utxos, payouts, batches):
+        self.disable_send()
+        wif = await self.app.session.get_coin_wif(self.coin)
+        sent = 0
+        error = None
+        for batch in batches:
+            inputs_to_use = [utxos[i] for i in batch["inputs"]]
+            outputs = [payouts[i] for i in batch["outputs"]]
+            raw_tx_hex, error = await self.build_transaction(wif, inputs_to_use, outputs, batch["fee"])
+            if error:
+                break
+            success, error = await self.api.broadcast_tx(raw_tx_hex)
+            if not success:
+                error = error or "Unknown error"
+                break
+            await self.record_broadcast(raw_tx_hex, inputs_to_use)
+            sent += len(outputs)
+        self.send_progress.value = 100
+        if error:
+            self.app.main_window.error_dialog(
+                "Broadcast failed",
+                f"{sent} of {len(payouts)} payouts were broadcast.\n\n{error}"
+            )
+        else:
+            self.app.main_window.info_dialog(
+                "Success", f"{len(payouts)} payouts broadcast in {len(batches)} transaction(s)"
+            )
+        self.enable_send()
+        self.app.sync.request_sync(self.coin, history=True)
+
+
+    async def confirmed_utxos(self):
+        utxos = await self.get_spendable_utxos()
+        return [u for u in utxos or [] if u.get("confirmations", 0) > 0]
+
+
+    async def consolidate_utxos(self, button):
+        if self.consolidation:
+            def on_stop(widget, result):
+                if result:
+                    self.consolidation = None
+                    self.consolidate_button.text = "Consolidate"
+            self.app.main_window.confirm_dialog(
+                "Consolidation",
+                f"{self.consolidation['remaining']} consolidation transaction(s) left.\n\n"
+                "Do you want to stop ?",
+                on_result=on_stop
+            )
+            return
+        threshold = None
+        try:
+            value = int(Decimal(self.amount_input.value) * SATOSHIS)
+            if value > 0:
+                threshold = value
+        except InvalidOperation:
+            pass
+        utxos = await self.confirmed_utxos()
+        chunks = coinselect.plan_consolidation([int(u["satoshis"]) for u in utxos], threshold, fee_rate=FEE_RATE)
+        if not chunks:
+            self.app.main_window.info_dialog(
+                "Consolidation", "Nothing to consolidate"
+            )
+            return
+        inputs = sum(len(chunk["inputs"]) for chunk in chunks)
+        fees = sum(chunk["fee"] for chunk in chunks)
+        saved_bytes = (inputs - len(chunks)) * coinselect.INPUT_SIZE
+        limit = (
+            f"below {self.app.utils.format_balance(threshold / SATOSHIS)} {self.coin}"
+            if threshold else "(set Amount to only merge smaller ones)"
+        )
+        async def on_confirm(widget, result):
+            if result:
+                self.consolidation = dict(threshold=threshold, remaining=len(chunks), busy=False)
+                self.consolidate_button.text = "Consolidating"
+                await self.consolidate_next()
+        self.app.main_window.confirm_dialog(
+            "Consolidation",
+            f"UTXOs : {inputs} {limit}\n"
+            f"Transactions : {len(chunks)}, one per block\n"
+            f"Consolidation fees : {self.app.utils.format_balance(fees / SATOSHIS)} {self.coin}\n"
+            f"Later sends : {saved_bytes} bytes smaller, "
+            f"{self.app.utils.format_balance(saved_bytes * FEE_RATE / SATOSHIS)} {self.coin} less in fees\n\n"
+            "Do you want to start ?",
+            on_result=on_confirm
+        )
+
+
+    async def consolidate_next(self):
+        plan = self.consolidation
+        if not plan or plan["busy"]:
+            return
+        plan["busy"] = True
+        error = None
+        try:
+            utxos = await self.confirmed_utxos()
+            chunks = coinselect.plan_consolidation(
+                [int(u["satoshis"]) for u in utxos], plan["threshold"], fee_rate=FEE_RATE
+            )
+            if chunks:
+                chunk = chunks[0]
+                inputs_to_use = [utxos[i] for i in chunk["inputs"]]
+                wif = await self.app.session.get_coin_wif(self.coin)
+                raw_tx_hex, error = await self.build_transaction(
+                    wif, inputs_to_use, [(self.address, chunk["total"] - chunk["fee"])], chunk["fee"]
+                )
+                if not error:
+                    success, error = await self.api.broadcast_tx(raw_tx_hex)
+                    if success:
+                        await self.record_broadcast(raw_tx_hex, inputs_to_use)
+                        plan["remaining"] -= 1
+                    else:
+                        error = error or "Unknown error"
+            if error or len(chunks) <= 1 or plan["remaining"] <= 0:
+                if self.consolidation is plan:
+                    self.consolidation = None
+                    self.consolidate_button.text = "Consolidate"
+        finally:
+            plan["busy"] = False
+        if error:
+            self.app.main_window.error_dialog(
+                "Consolidation failed", error
+            )
+
+
     def disable_redeem(self):
         self.redeem_button.enabled = False
         self.redeem_buttons.remove(self.reset_button)
@@ -964,7 +1336,7 @@ class Coin(Box):
         if current_platform == "darwin":
             address = await self.address_from_wif(wif)
         else:
-            address = self.app.utils.address_from_wif(self.app.coin, wif)
+            address = self.app.utils.address_from_wif(self.coin, wif)
         if not address:
             self.app.main_window.error_dialog(
                 "Error", "Invalid wallet import format (WIF)"
@@ -981,65 +1353,49 @@ class Coin(Box):
 
 
     async def address_from_wif(self, wif):
-        wallet_cli = str(self.app.utils.get_tool())
-        cmd = [wallet_cli, "--network", self.network, "--address-from-wif", "--wif", wif]
-        try:
-            creationflags = subprocess.CREATE_NO_WINDOW if current_platform == "windows" else 0
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=creationflags
-            )
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                self.app.main_window.error_dialog(
-                    "Error", stderr.decode().strip()
-                )
-                return None
-            address = stdout.decode().strip()
-            return address
-        except Exception as e:
+        address, error = await self.app.worker.call(
+            "address_from_wif", network=self.network, wif=wif
+        )
+        if error:
             self.app.main_window.error_dialog(
-                "Error", e
+                "Error", error
             )
+            return None
+        return address
 
 
     async def get_redeem_balance(self, address, wif):
-        addr_info = await self.app.api.get_address(address)
+        addr_info = await self.api.get_balance(address)
         if addr_info:
             confirmed = self.app.utils.format_balance(addr_info.get("balance", 0))
             unconfirmed = self.app.utils.format_balance(addr_info.get("unconfirmedBalance", 0))
             self.redeem_balance.text = f"Bal. :{confirmed} | Unconf. :{unconfirmed}"
             if float(confirmed) > 0:
                 self.redeem_button.text = "Redeem"
-                self.redeem_button.on_press = lambda widget, address=address, wif=wif: self.on_redeem_balance(address, wif)
+                async def on_redeem(widget):
+                    await self.on_redeem_balance(address, wif)
+                self.redeem_button.on_press = on_redeem
 
 
-    def on_redeem_balance(self, address, wif):
+    async def on_redeem_balance(self, address, wif):
         self.disable_redeem()
-        destination = self.app.vault.get_coin_address(self.app.account, self.app.password, self.app.coin)
-        self.app.loop.create_task(self.collet_redeem_utxos(destination, address, wif))
+        destination = await self.app.session.get_coin_address(self.coin)
+        await self.collet_redeem_utxos(destination, address, wif)
         
 
     async def collet_redeem_utxos(self, destination, address, wif):
-        utxos = await self.app.api.get_utxos(address)
+        utxos = await self.api.get_utxos(address, hedge=True)
         if not utxos:
             self.app.main_window.error_dialog(
                 "Error", "No UTXOs available"
             )
             self.enable_redeem()
             return
-        utxos.sort(key=lambda u: u.get("confirmations", 0), reverse=True)
-        total_input = 0
-        inputs_to_use = []
-        for u in utxos:
-            if u.get("confirmations", 0) <= 0:
-                continue
-            value_sat = int(round(float(u["amount"]) * 100_000_000))
-            inputs_to_use.append(u)
-            total_input += value_sat
-        fee_sat = 1_000
+        utxos = [u for u in utxos if u.get("confirmations", 0) > 0]
+        selection = coinselect.select_all([int(u["satoshis"]) for u in utxos], FEE_RATE)
+        inputs_to_use = [utxos[i] for i in selection["inputs"]] if selection else []
+        total_input = selection["total"] if selection else 0
+        fee_sat = max(selection["fee"], 1_000) if selection else 1_000
         if total_input <= fee_sat:
             self.app.main_window.error_dialog(
                 "Error", "Insufficient balance to cover transaction fee"
@@ -1047,19 +1403,19 @@ class Coin(Box):
             self.enable_redeem()
             return
         amount_sat = total_input - fee_sat
-        raw_tx_hex, error = await self.build_transaction(wif, inputs_to_use, destination, amount_sat, fee_sat)
+        raw_tx_hex, error = await self.build_transaction(wif, inputs_to_use, [(destination, amount_sat)], fee_sat)
         if error:
             self.app.main_window.error_dialog(
                 "Error", error
             )
             self.enable_redeem()
             return
-        success, error = await self.app.api.broadcast_tx(raw_tx_hex)
+        success, error = await self.api.broadcast_tx(raw_tx_hex)
         if success:
             async def on_result(widget, result):
                 self.redeem_buttons.remove(self.send_progress)
                 self.clear_redeem_page()
-                await self.fetch_transactions()
+                self.app.sync.request_sync(self.coin, history=True)
             self.send_progress.value = 100
             self.app.main_window.info_dialog(
                 "Success", "Transaction broadcast successfully",
@@ -0,0 +1,313 @@
+
+import random
+import time
+
+
+BASE_SIZE = 10
+INPUT_SIZE = 148
+OUTPUT_SIZE = 34
+CHANGE_THRESHOLD = 1_000
+MAX_TX_SIZE = 100_000
+CONSOLIDATE_MAX_INPUTS = 500
+BNB_MAX_TRIES = 20_000
+
+
+def estimate_tx_size(inputs: int, outputs: int) -> int:
+    return BASE_SIZE + inputs * INPUT_SIZE + outputs * OUTPUT_SIZE
+
+
+def branch_and_bound(values: list[int], target: int, window: int, max_tries: int = BNB_MAX_TRIES):
+    """Depth-first search for a subset whose sum lands in [target, target + window].
+
+    `values` must be sorted in descending order. Returns the list of indexes
+    with the least excess (fewest inputs on ties), or None.
+    """
+    available = sum(values)
+    if available < target:
+        return None
+    selection = []
+    current = 0
+    best = None
+    best_score = None
+    index = 0
+    for _ in range(max_tries):
+        backtrack = False
+        if current + available < target or current > target + window:
+            backtrack = True
+        elif current >= target:
+            score = (current - target, len(selection))
+            if best_score is None or score < best_score:
+                best = list(selection)
+                best_score = score
+                if score[0] == 0 and len(selection) == 1:
+                    break
+            backtrack = True
+        if backtrack:
+            if not selection:
+                break
+            index -= 1
+            while index > selection[-1]:
+                available += values[index]
+                index -= 1
+            current -= values[index]
+            selection.pop()
+        else:
+            value = values[index]
+            available -= value
+            # Skip siblings equal to an excluded value, they lead to the same subsets.
+            if not selection or index - 1 == selection[-1] or value != values[index - 1]:
+                selection.append(index)
+                current += value
+        index += 1
+    return best
+
+
+def knapsack(values: list[int], target: int):
+    """Pick between the smallest single value covering `target` and a pruned
+    descending accumulation of the smaller values, preferring the lower total.
+
+    `values` must be sorted in descending order.
+    """
+    lowest_larger = None
+    smaller = []
+    for i, value in enumerate(values):
+        if value == target:
+            return [i]
+        if value > target:
+            lowest_larger = i
+        else:
+            smaller.append(i)
+    subset = []
+    total = 0
+    for i in smaller:
+        subset.append(i)
+        total += values[i]
+        if total >= target:
+            break
+    if total >= target:
+        for i in reversed(subset[:-1]):
+            if total - values[i] >= target:
+                subset.remove(i)
+                total -= values[i]
+    else:
+        subset = None
+    if lowest_larger is not None and (subset is None or values[lowest_larger] <= total):
+        return [lowest_larger]
+    return subset
+
+
+def largest_first(values: list[int], target: int):
+    """Accumulate from the largest value down. `values` must be sorted descending."""
+    total = 0
+    for i, value in enumerate(values):
+        total += value
+        if total >= target:
+            return list(range(i + 1))
+    return None
+
+
+def select(
+    values: list[int],
+    amount: int,
+    fee_rate: int = 1,
+    outputs: int = 1,
+    fee: int | None = None,
+    change_threshold: int = CHANGE_THRESHOLD,
+    dust_threshold: int | None = None,
+    strategy: str | None = None
+):
+    """Choose inputs paying `amount` to `outputs` recipients.
+
+    Fees are charged per byte at `fee_rate` unless a fixed `fee` is given.
+    Leftovers up to `change_threshold` are left to the fee instead of
+    creating a change output, and inputs worth no more than
+    `dust_threshold` (by default the cost of spending them) are ignored.
+    By default the cheapest of the branch-and-bound, knapsack and
+    largest-first results is kept; `strategy` forces "bnb", "knapsack" or
+    "largest". Returns a
+    dict with the chosen `inputs` (indexes into `values`), `total`, `fee`
+    (including any leftover given up to the fee) and `change`, or None.
+    """
+    if fee is None:
+        input_cost = INPUT_SIZE * fee_rate
+        base_cost = estimate_tx_size(0, outputs) * fee_rate
+        change_cost = OUTPUT_SIZE * fee_rate
+    else:
+        input_cost = 0
+        base_cost = fee
+        change_cost = 0
+    if dust_threshold is None:
+        dust_threshold = INPUT_SIZE * fee_rate
+    order = sorted(
+        (i for i, v in enumerate(values) if v > dust_threshold),
+        key=values.__getitem__,
+        reverse=True
+    )
+    effective = [values[i] - input_cost for i in order]
+    target = amount + base_cost
+
+    candidates = []
+    if strategy in (None, "bnb"):
+        candidates.append(branch_and_bound(effective, target, change_threshold))
+    if strategy in (None, "knapsack"):
+        candidates.append(knapsack(effective, target))
+    if strategy in (None, "largest"):
+        candidates.append(largest_first(effective, target))
+
+    best = None
+    for picked in candidates:
+        if picked is None:
+            continue
+        inputs = [order[i] for i in picked]
+        total = sum(values[i] for i in inputs)
+        fee_sat = base_cost + len(inputs) * input_cost
+        change = total - amount - fee_sat
+        if change - change_cost > change_threshold:
+            fee_sat += change_cost
+            change -= change_cost
+        else:
+            fee_sat += change
+            change = 0
+        if best is None or (fee_sat, len(inputs)) < (best["fee"], len(best["inputs"])):
+            best = dict(inputs=inputs, total=total, fee=fee_sat, change=change)
+    return best
+
+
+def select_all(values: list[int], fee_rate: int = 1, outputs: int = 1, dust_threshold: int | None = None):
+    """Sweep every non-dust input into `outputs` recipients without change."""
+    if dust_threshold is None:
+        dust_threshold = INPUT_SIZE * fee_rate
+    inputs = [i for i, v in enumerate(values) if v > dust_threshold]
+    if not inputs:
+        return None
+    total = sum(values[i] for i in inputs)
+    fee_sat = estimate_tx_size(len(inputs), outputs) * fee_rate
+    return dict(inputs=inputs, total=total, fee=fee_sat, change=0)
+
+
+def select_batches(values: list[int], amounts: list[int], fee_rate: int = 1, max_size: int = MAX_TX_SIZE):
+    """Split payouts `amounts` into transactions of at most `max_size` bytes.
+
+    Outputs are packed in order, at most half of `max_size` per
+    transaction so inputs fit in the rest, and every transaction draws
+    its inputs from what earlier ones left in `values`. Returns a list of
+    selections as from select(), each with its payout indexes in
+    `outputs` and its estimated `size`, or None if the funds or size
+    limit do not allow it.
+    """
+    max_outputs = max((max_size // 2 - BASE_SIZE) // OUTPUT_SIZE, 1)
+    available = list(range(len(values)))
+    batches = []
+    for start in range(0, len(amounts), max_outputs):
+        outputs = list(range(start, min(start + max_outputs, len(amounts))))
+        selection = select(
+            [values[i] for i in available],
+            sum(amounts[i] for i in outputs),
+            fee_rate,
+            outputs=len(outputs)
+        )
+        if selection is None:
+            return None
+        inputs = [available[i] for i in selection["inputs"]]
+        size = estimate_tx_size(len(inputs), len(outputs) + (1 if selection["change"] else 0))
+        if size > max_size:
+            return None
+        used = set(inputs)
+        available = [i for i in available if i not in used]
+        batches.append(dict(selection, inputs=inputs, outputs=outputs, size=size))
+    return batches
+
+
+def plan_consolidation(
+    values: list[int],
+    threshold: int | None = None,
+    max_inputs: int = CONSOLIDATE_MAX_INPUTS,
+    fee_rate: int = 1,
+    dust_threshold: int | None = None
+):
+    """Group values below `threshold` (all when None), smallest first,
+    into sweeps of at most `max_inputs` inputs paying one output each.
+
+    Returns a list of selections as from select(); chunks of a single
+    input are left out since sweeping them saves nothing.
+    """
+    if dust_threshold is None:
+        dust_threshold = INPUT_SIZE * fee_rate
+    max_inputs = max(min(max_inputs, (MAX_TX_SIZE - estimate_tx_size(0, 1)) // INPUT_SIZE), 2)
+    small = sorted(
+        (i for i, v in enumerate(values) if v > dust_threshold and (threshold is None or v < threshold)),
+        key=values.__getitem__
+    )
+    chunks = []
+    for start in range(0, len(small), max_inputs):
+        inputs = small[start:start + max_inputs]
+        if len(inputs) < 2:
+            break
+        total = sum(values[i] for i in inputs)
+        fee_sat = estimate_tx_size(len(inputs), 1) * fee_rate
+        if total - fee_sat <= dust_threshold:
+            continue
+        chunks.append(dict(inputs=inputs, total=total, fee=fee_sat, change=0))
+    return chunks
+
+
+def greedy(utxos: list[dict], amount: int, fee_rate: int = 1):
+    """The selection previously used by Coin: oldest first, until covered."""
+    utxos = sorted(utxos, key=lambda u: u["confirmations"], reverse=True)
+    total = 0
+    count = 0
+    fee_sat = 0
+    for u in utxos:
+        total += u["satoshis"]
+        count += 1
+        fee_sat = estimate_tx_size(count, 1) * fee_rate
+        if total >= amount + fee_sat:
+            return count, fee_sat
+    return None
+
+
+def benchmark(sizes=(100, 1_000, 10_000), rounds: int = 20, seed: int = 1):
+    rng = random.Random(seed)
+    print(f"{'utxos':>7} {'strategy':>9} {'avg inputs':>11} {'avg fee':>9} {'avg ms':>8} {'failed':>7}")
+    for size in sizes:
+        cases = []
+        for _ in range(rounds):
+            utxos = [
+                dict(
+                    satoshis=int(rng.lognormvariate(13, 2.5)) + 1,
+                    confirmations=rng.randint(1, 100_000)
+                )
+                for _ in range(size)
+            ]
+            balance = sum(u["satoshis"] for u in utxos)
+            cases.append((utxos, rng.randint(1, balance // 4)))
+
+        def run(name, func):
+            inputs = fees = failed = 0
+            start = time.perf_counter()
+            for utxos, amount in cases:
+                result = func(utxos, amount)
+                if result is None:
+                    failed += 1
+                    continue
+                inputs += result[0]
+                fees += result[1]
+            elapsed = (time.perf_counter() - start) * 1000 / rounds
+            done = max(rounds - failed, 1)
+            print(f"{size:>7} {name:>9} {inputs / done:>11.1f} {fees / done:>9.0f} {elapsed:>8.2f} {failed:>7}")
+
+        def strategy(name):
+            def func(utxos, amount):
+                result = select([u["satoshis"] for u in utxos], amount, strategy=name)
+                return result and (len(result["inputs"]), result["fee"])
+            return func
+
+        run("greedy", greedy)
+        run("bnb", strategy("bnb"))
+        run("knapsack", strategy("knapsack"))
+        run("largest", strategy("largest"))
+        run("auto", strategy(None))
+
+
+if __name__ == "__main__":
+    benchmark()
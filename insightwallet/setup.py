@@ -250,8 +250,10 @@ class Setup(Box):
         )
         self.account_password.on_change = None
         self.account_password.value = ""
-        self.account_password.on_confirm = lambda widget, account=account: self.verify_account(account)
-        self.confirm_button.on_press = lambda widget, account=account: self.verify_account(account)
+        async def on_confirm(widget):
+            await self.verify_account(account)
+        self.account_password.on_confirm = on_confirm
+        self.confirm_button.on_press = on_confirm
 
 
     def cancel_account_access(self, button):
@@ -267,10 +269,10 @@ class Setup(Box):
         self.create_panel.remove(self.password_rules)
 
 
-    def verify_create_inputs(self, button):
-        def on_result(dialog, result):
+    async def verify_create_inputs(self, button):
+        async def on_result(dialog, result):
             self.app.account = name
-            self.app.password = password
+            self.app.session = await self.app.vault.open_session(name, password)
             self.app.main_window.content = Wallet(self.app)
         name = self.account_name.value.strip()
         password = self.account_password.value.strip()
@@ -297,7 +299,7 @@ class Setup(Box):
             self.account_name.focus()
             return
         try:
-            created = self.app.vault.create_vault(name, password)
+            created = await self.app.vault.run(self.app.vault.create_vault, name, password)
             if not created:
                 raise RuntimeError("Vault creation failed")
         except Exception as e:
@@ -308,7 +310,7 @@ class Setup(Box):
         )
 
 
-    def verify_account(self, account: str):
+    async def verify_account(self, account: str):
         password = self.account_password.value.strip()
         if not password:
             self.account_password.focus()
@@ -318,8 +320,7 @@ class Setup(Box):
         self.account_password.readonly = True
 
         try:
-            conn, _ = self.app.vault.open_vault(account, password)
-            conn.close()
+            session = await self.app.vault.open_session(account, password)
         except Exception:
             self.app.main_window.error_dialog(
                 "Error", "Invalid password"
@@ -329,7 +330,7 @@ class Setup(Box):
             self.account_password.readonly = False
             return
         self.app.account = account
-        self.app.password = password
+        self.app.session = session
         self.app.main_window.content = Wallet(self.app)
 
 
@@ -0,0 +1,305 @@
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from toga import App
+
+from .api import InsightAPI
+from .tasks import TaskSupervisor
+
+
+SATOSHIS = 100_000_000
+POLL_INTERVAL = 15
+BACKGROUND_INTERVAL = 60
+SYNC_CONCURRENCY = 3
+PARKED_ROWS = 1_000
+
+
+class SyncScheduler:
+    def __init__(self, app:App):
+
+        self.app = app
+        self.apis = {}
+        self.addresses = {}
+        self.heights = {}
+        self.balances = {}
+        self.last_polled = {}
+        self.views = {}
+        self.parked = {}
+        self.hosts = {}
+        self.dirty = {}
+        self.tasks = TaskSupervisor()
+        self.semaphore = asyncio.Semaphore(SYNC_CONCURRENCY)
+
+
+    def get_api(self, coin) -> InsightAPI:
+        api = self.apis.get(coin)
+        if api is None:
+            coin_info = self.app.utils.get_coin(coin)
+            api = InsightAPI(self.app, coin)
+            api.set_endpoints(coin_info["api"], coin_info.get("secondary", []))
+            self.apis[coin] = api
+        return api
+
+
+    async def start(self):
+        for coin in await self.app.session.list_coins():
+            await self.add_coin(coin)
+
+
+    async def add_coin(self, coin):
+        if coin in self.addresses:
+            return
+        address = await self.app.session.get_coin_address(coin)
+        if not address or coin in self.addresses:
+            return
+        self.addresses[coin] = address
+        api = self.get_api(coin)
+
+        # Socket callbacks only queue a sync, the socket keeps reading meanwhile.
+        def on_block(block):
+            self.request_sync(coin)
+
+        def on_address(txid):
+            self.request_sync(coin, history=True)
+
+        self.tasks.spawn(api.subscribe(address, on_block, on_address), ("socket", coin))
+        host = urlsplit(api.endpoints[0]).netloc
+        self.hosts.setdefault(host, []).append(coin)
+        if not self.tasks.running(("poll", host)):
+            self.tasks.spawn(self.poll_host(host), ("poll", host))
+        else:
+            self.request_sync(coin)
+
+
+    def attach(self, coin, view):
+        self.views[coin] = view
+        if coin in self.heights:
+            view.on_height(self.heights[coin])
+        if coin in self.balances:
+            view.on_balance(self.balances[coin])
+        if coin in self.parked:
+            rows = self.parked.pop(coin)
+            if rows is None:
+                view.on_history_reset()
+            elif rows:
+                view.on_transactions(list(rows.values()))
+        self.request_sync(coin)
+
+
+    def detach(self, coin, view, park: bool = True):
+        # A parked view is kept hidden by the wallet: rows synced meanwhile are
+        # held for it by txid, or replaced by a reset once there are too many.
+        if self.views.get(coin) is view:
+            del self.views[coin]
+        if park:
+            self.parked.setdefault(coin, {})
+        else:
+            self.parked.pop(coin, None)
+
+
+    def publish(self, coin, handler, *args):
+        view = self.views.get(coin)
+        if view is not None:
+            getattr(view, handler)(*args)
+        elif self.parked.get(coin) is not None:
+            if handler == "on_history_reset" or len(self.parked[coin]) > PARKED_ROWS:
+                self.parked[coin] = None
+            elif handler == "on_transactions":
+                # A txid synced again, e.g. once it confirms, keeps its latest row.
+                self.parked[coin].update((row["txid"], row) for row in args[0])
+
+
+    async def poll_host(self, host):
+        # One cadence per explorer host: the visible coin every POLL_INTERVAL,
+        # the others every BACKGROUND_INTERVAL, skipped while their socket is live.
+        while True:
+            now = time.monotonic()
+            for coin in list(self.hosts[host]):
+                interval = POLL_INTERVAL if coin in self.views else BACKGROUND_INTERVAL
+                if self.apis[coin].socket_connected and coin in self.heights:
+                    continue
+                if now - self.last_polled.get(coin, 0) >= interval:
+                    self.request_sync(coin)
+            await asyncio.sleep(POLL_INTERVAL)
+
+
+    def request_sync(self, coin, history: bool = False):
+        # A request during a running sync marks it dirty so it runs once more.
+        self.dirty[coin] = self.dirty.get(coin, False) or history
+        return self.tasks.spawn(self.run_sync(coin), ("sync", coin))
+
+
+    async def run_sync(self, coin):
+        while coin in self.dirty:
+            history = self.dirty.pop(coin)
+            try:
+                async with self.semaphore:
+                    await self.sync_coin(coin, history)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Sync error for {coin}: {e}")
+
+
+    async def sync_coin(self, coin, history: bool = False):
+        api = self.apis[coin]
+        address = self.addresses[coin]
+        self.last_polled[coin] = time.monotonic()
+        height = await api.get_block_height()
+        if height and height > self.heights.get(coin, 0):
+            self.publish(coin, "on_height", height)
+            # The tip only counts as seen once its history is checkpointed,
+            # until then every poll retries it.
+            if await self.sync_history(coin, height):
+                self.heights[coin] = height
+        elif history:
+            await self.fetch_transactions(coin)
+        balance = await api.get_balance(address)
+        if balance:
+            self.balances[coin] = balance
+            self.publish(coin, "on_balance", balance)
+
+
+    async def sync_history(self, coin, tip) -> bool:
+        api = self.apis[coin]
+        session = self.app.session
+        state = await session.get_sync_state(coin)
+        verified = True
+        if state:
+            if state["height"] >= tip:
+                return True
+            # Without the checkpoint hash the reorg check waits for the next
+            # sync, the history below is still brought up to date.
+            block_hash = await api.get_block_hash(state["height"])
+            verified = bool(block_hash)
+            if verified and block_hash != state["block_hash"]:
+                await session.rollback_sync(coin, state["height"])
+                self.publish(coin, "on_history_reset")
+        await self.fetch_transactions(coin)
+        evicted = await session.prune_pending(coin, tip)
+        if evicted:
+            self.publish(coin, "on_history_reset")
+        utxos = await api.get_utxos(self.addresses[coin])
+        if utxos is not None:
+            await session.replace_utxos(coin, utxos)
+        if not verified:
+            return False
+        tip_hash = await api.get_block_hash(tip)
+        if not tip_hash:
+            return False
+        await session.set_sync_state(coin, tip, tip_hash)
+        return True
+
+
+    async def fetch_transactions(self, coin):
+        api = self.apis[coin]
+        address = self.addresses[coin]
+        session = self.app.session
+        known = lambda txids: session.known_txids(coin, txids)
+        async for transactions in api.iter_transactions(address, known=known):
+            rows = []
+            created = []
+            spent = []
+            for tx in transactions:
+                txid = tx.get("txid")
+                outputs, inputs = self.extract_utxo_changes(tx, address)
+                created.extend(outputs)
+                spent.extend(inputs)
+                tx_type, amount = self.classify_tx(tx, address)
+                if not tx_type:
+                    continue
+                rows.append(dict(
+                    txid=txid,
+                    type=tx_type,
+                    amount=int(round(amount * SATOSHIS)),
+                    timestamp=self.get_tx_timestamp(tx),
+                    height=self.get_tx_height(tx)
+                ))
+            if created or spent:
+                await session.update_utxos(coin, created, spent)
+            if not rows:
+                continue
+            await session.add_transactions(coin, rows)
+            # Each page is published as it is stored; known txids only come back
+            # while unconfirmed and the view updates those in place.
+            self.publish(coin, "on_transactions", rows)
+
+
+    def classify_tx(self, tx: dict, address: str):
+        sent = 0.0
+        received = 0.0
+        for vin in tx.get("vin", []):
+            if vin.get("addr") == address:
+                sent += float(vin.get("value", 0))
+            elif address in vin.get("addresses", []):
+                sent += int(vin.get("value", 0)) / SATOSHIS
+
+        for vout in tx.get("vout", []):
+            spk = vout.get("scriptPubKey", {})
+            addresses = spk.get("addresses", [])
+            if address in addresses:
+                received += float(vout.get("value", 0))
+            elif address in vout.get("addresses", []):
+                received += int(vout.get("value", 0)) / SATOSHIS
+        net = received - sent
+        if net > 0:
+            return "receive", net
+        elif net < 0:
+            return "send", abs(net)
+        else:
+            return None, 0
+
+
+    def extract_utxo_changes(self, tx: dict, address: str):
+        txid = tx.get("txid")
+        height = self.get_tx_height(tx)
+        created = []
+        spent = []
+        for vin in tx.get("vin", []):
+            if "coinbase" in vin or not vin.get("txid"):
+                continue
+            if vin.get("addr") == address:
+                satoshis = vin.get("valueSat")
+                if satoshis is None:
+                    satoshis = round(float(vin.get("value", 0)) * SATOSHIS)
+            elif address in vin.get("addresses", []):
+                satoshis = vin.get("value", 0)
+            else:
+                continue
+            spent.append((vin["txid"], int(vin.get("vout", 0)), int(satoshis), txid))
+
+        for vout in tx.get("vout", []):
+            spk = vout.get("scriptPubKey", {})
+            if address in spk.get("addresses", []):
+                satoshis = round(float(vout.get("value", 0)) * SATOSHIS)
+            elif address in vout.get("addresses", []):
+                satoshis = int(vout.get("value", 0))
+            else:
+                continue
+            created.append((txid, int(vout.get("n", 0)), satoshis, height))
+        return created, spent
+
+
+    def get_tx_timestamp(self, tx: dict) -> int:
+        if tx.get("time"):
+            return int(tx["time"])
+        if tx.get("blocktime"):
+            return int(tx["blocktime"])
+        return int(datetime.now(timezone.utc).timestamp())
+
+
+    def get_tx_height(self, tx: dict) -> int | None:
+        height = tx.get("blockheight", tx.get("blockHeight"))
+        if height is None or int(height) <= 0:
+            return None
+        return int(height)
+
+
+    async def stop(self):
+        await self.tasks.stop()
+        self.dirty.clear()
+        for api in self.apis.values():
+            await api.close()
@@ -0,0 +1,60 @@
+
+import asyncio
+
+
+class TaskSupervisor:
+    def __init__(self):
+
+        self.tasks = {}
+        self.next_id = 0
+
+
+    def spawn(self, coro, key=None) -> asyncio.Task:
+        # Keyed tasks are single-flight: while one runs, spawning the same key returns it.
+        if key is not None:
+            task = self.tasks.get(key)
+            if task and not task.done():
+                coro.close()
+                return task
+        else:
+            self.next_id += 1
+            key = self.next_id
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks[key] = task
+        task.add_done_callback(lambda t, key=key: self.discard(key, t))
+        return task
+
+
+    def discard(self, key, task):
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        if not task.cancelled() and task.exception():
+            print(f"Task {key} failed: {task.exception()}")
+
+
+    def running(self, key) -> bool:
+        task = self.tasks.get(key)
+        return task is not None and not task.done()
+
+
+    @property
+    def live(self) -> int:
+        return sum(1 for task in self.tasks.values() if not task.done())
+
+
+    def cancel(self, key=None):
+        if key is not None:
+            task = self.tasks.pop(key, None)
+            if task:
+                task.cancel()
+            return
+        tasks = list(self.tasks.values())
+        self.tasks.clear()
+        for task in tasks:
+            task.cancel()
+
+
+    async def stop(self):
+        tasks = list(self.tasks.values())
+        self.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,145 @@
+
+import hashlib
+import struct
+
+
+SAPLING_VERSION = 4
+SAPLING_VERSION_GROUP_ID = 0x892F2085
+SPEND_SIZE = 384
+OUTPUT_SIZE = 948
+JOINSPLIT_SIZE = 1698
+JOINSPLIT_SIZE_BCTV14 = 1802
+
+
+def compact_size(n: int) -> bytes:
+    if n < 0xFD:
+        return struct.pack("<B", n)
+    if n <= 0xFFFF:
+        return b"\xfd" + struct.pack("<H", n)
+    if n <= 0xFFFFFFFF:
+        return b"\xfe" + struct.pack("<I", n)
+    return b"\xff" + struct.pack("<Q", n)
+
+
+def var_bytes(data: bytes) -> bytes:
+    return compact_size(len(data)) + data
+
+
+def p2pkh_script(pubkey_hash: bytes) -> bytes:
+    return b"\x76\xa9\x14" + pubkey_hash + b"\x88\xac"
+
+
+def outpoint(txid: str, vout: int) -> bytes:
+    return bytes.fromhex(txid)[::-1] + struct.pack("<I", vout)
+
+
+def serialize_output(satoshis: int, script: bytes) -> bytes:
+    return struct.pack("<q", satoshis) + var_bytes(script)
+
+
+def serialize_transaction(tx: dict) -> bytes:
+    parts = [
+        struct.pack("<I", tx["version"] | 1 << 31),
+        struct.pack("<I", tx["version_group_id"]),
+        compact_size(len(tx["inputs"])),
+    ]
+    for (txid, vout), script_sig, sequence in zip(tx["inputs"], tx["script_sigs"], tx["sequences"]):
+        parts.append(outpoint(txid, vout) + var_bytes(script_sig) + struct.pack("<I", sequence))
+    parts.append(compact_size(len(tx["outputs"])))
+    parts.extend(serialize_output(satoshis, script) for satoshis, script in tx["outputs"])
+    parts += [
+        struct.pack("<I", tx["lock_time"]),
+        struct.pack("<I", tx["expiry_height"]),
+        struct.pack("<q", tx["value_balance"]),
+        compact_size(len(tx["shielded_spends"])),
+        *tx["shielded_spends"],
+        compact_size(len(tx["shielded_outputs"])),
+        *tx["shielded_outputs"],
+        compact_size(len(tx["joinsplits"])),
+        *tx["joinsplits"],
+    ]
+    if tx["joinsplits"]:
+        parts += [tx["joinsplit_pubkey"], tx["joinsplit_sig"]]
+    if tx["shielded_spends"] or tx["shielded_outputs"]:
+        parts.append(tx["binding_sig"])
+    return b"".join(parts)
+
+
+def parse_transaction(raw_tx_hex: str) -> dict:
+    """Read a transparent, Overwinter or Sapling transaction into its fields.
+
+    Shielded descriptions are kept as raw bytes. Raises ValueError if
+    `raw_tx_hex` cannot be parsed.
+    """
+    data = bytes.fromhex(raw_tx_hex)
+    offset = 0
+
+    def read(n):
+        nonlocal offset
+        if offset + n > len(data):
+            raise ValueError("Truncated transaction")
+        chunk = data[offset:offset + n]
+        offset += n
+        return chunk
+
+    def read_compact():
+        n = read(1)[0]
+        if n < 0xFD:
+            return n
+        return int.from_bytes(read({0xFD: 2, 0xFE: 4, 0xFF: 8}[n]), "little")
+
+    header = struct.unpack("<I", read(4))[0]
+    version = header & 0x7FFFFFFF
+    overwintered = bool(header >> 31)
+    sapling = overwintered and version >= SAPLING_VERSION
+    version_group_id = struct.unpack("<I", read(4))[0] if overwintered else 0
+    inputs = []
+    script_sigs = []
+    sequences = []
+    for _ in range(read_compact()):
+        prevout = read(36)
+        script_sigs.append(read(read_compact()))
+        sequences.append(struct.unpack("<I", read(4))[0])
+        inputs.append((prevout[:32][::-1].hex(), struct.unpack("<I", prevout[32:])[0]))
+    outputs = []
+    for _ in range(read_compact()):
+        satoshis = struct.unpack("<q", read(8))[0]
+        outputs.append((satoshis, read(read_compact())))
+    lock_time = struct.unpack("<I", read(4))[0]
+    expiry_height = struct.unpack("<I", read(4))[0] if overwintered and version >= 3 else 0
+    value_balance = 0
+    shielded_spends = []
+    shielded_outputs = []
+    if sapling:
+        value_balance = struct.unpack("<q", read(8))[0]
+        shielded_spends = [read(SPEND_SIZE) for _ in range(read_compact())]
+        shielded_outputs = [read(OUTPUT_SIZE) for _ in range(read_compact())]
+    joinsplits = []
+    joinsplit_pubkey = joinsplit_sig = binding_sig = b""
+    if version >= 2:
+        size = JOINSPLIT_SIZE if sapling else JOINSPLIT_SIZE_BCTV14
+        joinsplits = [read(size) for _ in range(read_compact())]
+        if joinsplits:
+            joinsplit_pubkey = read(32)
+            joinsplit_sig = read(64)
+    if shielded_spends or shielded_outputs:
+        binding_sig = read(64)
+    return dict(
+        txid=hashlib.sha256(hashlib.sha256(data).digest()).digest()[::-1].hex(),
+        overwintered=overwintered,
+        version=version,
+        version_group_id=version_group_id,
+        inputs=inputs,
+        script_sigs=script_sigs,
+        sequences=sequences,
+        outputs=outputs,
+        lock_time=lock_time,
+        expiry_height=expiry_height,
+        value_balance=value_balance,
+        shielded_spends=shielded_spends,
+        shielded_outputs=shielded_outputs,
+        joinsplits=joinsplits,
+        joinsplit_pubkey=joinsplit_pubkey,
+        joinsplit_sig=joinsplit_sig,
+        binding_sig=binding_sig
+    )
@@ -1,35 +1,149 @@
 
 from toga import App
+import asyncio
 import re
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from nacl import utils
 from nacl.secret import SecretBox
 from nacl.pwhash import argon2id
 
 
-SCHEMA_SQL = """
-CREATE TABLE IF NOT EXISTS meta (
-    key TEXT PRIMARY KEY,
-    value BLOB NOT NULL
-);
+SATOSHIS = 100_000_000
+REORG_DEPTH = 10
 
-CREATE TABLE IF NOT EXISTS coins (
-    coin TEXT PRIMARY KEY,
-    address BLOB NOT NULL,
-    wif BLOB NOT NULL
-);
 
-CREATE TABLE IF NOT EXISTS transactions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    coin TEXT NOT NULL,
-    txid TEXT NOT NULL,
-    type TEXT NOT NULL,
-    amount TEXT NOT NULL,
-    timestamp TEXT NOT NULL,
-    UNIQUE(coin, txid)
-);
-"""
+def migrate_base(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS coins (
+            coin TEXT PRIMARY KEY,
+            address BLOB NOT NULL,
+            wif BLOB NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            coin TEXT NOT NULL,
+            txid TEXT NOT NULL,
+            type TEXT NOT NULL,
+            amount TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            UNIQUE(coin, txid)
+        )
+    """)
+
+
+def migrate_sync_state(conn: sqlite3.Connection):
+    columns = {r[1] for r in conn.execute("PRAGMA table_info(transactions)")}
+    if "height" not in columns:
+        conn.execute("ALTER TABLE transactions ADD COLUMN height INTEGER")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            coin TEXT PRIMARY KEY,
+            height INTEGER NOT NULL,
+            block_hash TEXT NOT NULL
+        )
+    """)
+
+
+def migrate_typed_transactions(conn: sqlite3.Connection):
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_history")
+    conn.execute("""
+        CREATE TABLE transactions_typed (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            coin TEXT NOT NULL,
+            txid TEXT NOT NULL,
+            type TEXT NOT NULL,
+            amount INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            height INTEGER,
+            UNIQUE(coin, txid)
+        )
+    """)
+    conn.execute(f"""
+        INSERT INTO transactions_typed (id, coin, txid, type, amount, timestamp, height)
+        SELECT
+            id, coin, txid, type,
+            CAST(ROUND(CAST(amount AS REAL) * {SATOSHIS}) AS INTEGER),
+            CAST(timestamp AS INTEGER),
+            height
+        FROM transactions
+    """)
+    conn.execute("DROP TABLE transactions")
+    conn.execute("ALTER TABLE transactions_typed RENAME TO transactions")
+    conn.execute("""
+        CREATE INDEX idx_transactions_history
+        ON transactions (coin, timestamp DESC, id DESC, txid, type, amount)
+    """)
+    conn.execute("""
+        CREATE INDEX idx_transactions_balance
+        ON transactions (coin, type, amount)
+    """)
+    conn.execute("""
+        CREATE INDEX idx_transactions_search
+        ON transactions (txid, coin)
+    """)
+    conn.execute("""
+        CREATE INDEX idx_transactions_height
+        ON transactions (coin, height)
+    """)
+
+
+def migrate_utxos(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE utxos (
+            coin TEXT NOT NULL,
+            txid TEXT NOT NULL,
+            vout INTEGER NOT NULL,
+            satoshis INTEGER NOT NULL,
+            height INTEGER,
+            spent_by TEXT,
+            PRIMARY KEY (coin, txid, vout)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX idx_utxos_spendable
+        ON utxos (coin, spent_by, satoshis)
+    """)
+
+
+def migrate_pending_txs(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE pending_txs (
+            coin TEXT NOT NULL,
+            txid TEXT NOT NULL,
+            expiry_height INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (coin, txid)
+        )
+    """)
+
+
+def migrate_history_height(conn: sqlite3.Connection):
+    conn.execute("DROP INDEX IF EXISTS idx_transactions_history")
+    conn.execute("""
+        CREATE INDEX idx_transactions_history
+        ON transactions (coin, timestamp DESC, id DESC, txid, type, amount, height)
+    """)
+
+
+MIGRATIONS = [
+    migrate_base,
+    migrate_sync_state,
+    migrate_typed_transactions,
+    migrate_utxos,
+    migrate_pending_txs,
+    migrate_history_height,
+]
 
 
 class Vault:
@@ -37,6 +151,15 @@ class Vault:
         self.app = app
         self.data_path: Path = app.paths.data
         self.data_path.mkdir(parents=True, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault")
+
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
 
 
     def safe_account(self, account: str) -> str:
@@ -73,7 +196,7 @@ class Vault:
         conn.execute("PRAGMA foreign_keys = ON")
         salt = utils.random(argon2id.SALTBYTES)
         key = self.derive_key(password, salt)
-        conn.executescript(SCHEMA_SQL)
+        self.migrate(conn)
 
         conn.execute(
             "INSERT INTO meta (key, value) VALUES (?, ?)",
@@ -118,6 +241,38 @@ class Vault:
 
         return conn, key
 
+    def migrate(self, conn: sqlite3.Connection):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            return
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for migration in MIGRATIONS[version:]:
+                migration(conn)
+            conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.isolation_level = isolation_level
+
+    def upgrade_schema(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        self.migrate(conn)
+
+    def unlock(self, account: str, password: str) -> "VaultSession":
+        conn, key = self.open_vault(account, password)
+        self.upgrade_schema(conn)
+        return VaultSession(self, account, conn, key)
+
+    async def open_session(self, account: str, password: str) -> "AsyncVaultSession":
+        session = await self.run(self.unlock, account, password)
+        return AsyncVaultSession(self, session)
+
     def list_accounts(self) -> list[str]:
         return sorted(
             f.name[len("wallet_"):-3]
@@ -125,104 +280,357 @@ class Vault:
             if f.is_file() and f.name.startswith("wallet_") and f.name.endswith(".db")
         )
 
-    def add_coin(self, account, password, coin, address, wif) -> bool:
-        conn, key = self.open_vault(account, password)
+
+class VaultSession:
+    def __init__(self, vault: Vault, account: str, conn: sqlite3.Connection, key: bytes):
+        self.vault = vault
+        self.app = vault.app
+        self.account = account
+        self.conn = conn
+        self.box = SecretBox(key)
+
+    @property
+    def locked(self) -> bool:
+        return self.conn is None
+
+    def lock(self):
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+        self.box = None
+
+    def encrypt(self, value: str) -> bytes:
+        return self.box.encrypt(value.encode("utf-8"))
+
+    def decrypt(self, value: bytes) -> str:
+        return self.box.decrypt(value).decode("utf-8")
+
+    def add_coin(self, coin, address, wif) -> bool:
         try:
-            conn.execute(
-                "INSERT INTO coins VALUES (?, ?, ?)",
-                (coin, self.encrypt(key, address), self.encrypt(key, wif)),
-            )
-            conn.commit()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT INTO coins VALUES (?, ?, ?)",
+                    (coin, self.encrypt(address), self.encrypt(wif)),
+                )
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
 
-    def list_coins(self, account, password) -> list[str]:
-        conn, _ = self.open_vault(account, password)
-        rows = conn.execute("SELECT coin FROM coins").fetchall()
-        conn.close()
+    def list_coins(self) -> list[str]:
+        rows = self.conn.execute("SELECT coin FROM coins").fetchall()
         return [r[0] for r in rows]
 
-    def get_coin_address(self, account, password, coin):
-        conn, key = self.open_vault(account, password)
-        row = conn.execute(
+    def get_coin_address(self, coin):
+        row = self.conn.execute(
             "SELECT address FROM coins WHERE coin=?",
             (coin,),
         ).fetchone()
-        conn.close()
-        return self.decrypt(key, row[0]) if row else None
+        return self.decrypt(row[0]) if row else None
 
-    def get_coin_wif(self, account, password, coin):
-        conn, key = self.open_vault(account, password)
-        row = conn.execute(
+    def get_coin_wif(self, coin):
+        row = self.conn.execute(
             "SELECT wif FROM coins WHERE coin=?",
             (coin,),
         ).fetchone()
-        conn.close()
-        return self.decrypt(key, row[0]) if row else None
+        return self.decrypt(row[0]) if row else None
 
-    def add_transaction(
-        self, account, password, coin, tx_type, txid, amount, timestamp
-    ) -> bool:
-        conn, _ = self.open_vault(account, password)
+    def add_transaction(self, coin, tx_type, txid, amount, timestamp) -> bool:
         try:
-            conn.execute(
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT INTO transactions
+                    (coin, txid, type, amount, timestamp)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (coin, txid, tx_type, amount, timestamp),
+                )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def add_transactions(self, coin, rows: list[dict]) -> list[str]:
+        txids = [row["txid"] for row in rows]
+        existing = set()
+        with self.conn:
+            for i in range(0, len(txids), 500):
+                chunk = txids[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    r[0] for r in self.conn.execute(
+                        f"SELECT txid FROM transactions WHERE coin=? AND txid IN ({placeholders})",
+                        (coin, *chunk),
+                    )
+                )
+            self.conn.executemany(
                 """
                 INSERT INTO transactions
-                (coin, txid, type, amount, timestamp)
+                (coin, txid, type, amount, timestamp, height)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(coin, txid) DO UPDATE SET height=excluded.height
+                WHERE transactions.height IS NULL
+                """,
+                (
+                    (coin, row["txid"], row["type"], row["amount"], row["timestamp"], row.get("height"))
+                    for row in rows
+                ),
+            )
+        new = []
+        for txid in txids:
+            if txid not in existing:
+                existing.add(txid)
+                new.append(txid)
+        return new
+
+    def known_txids(self, coin, txids: list[str]) -> set[str]:
+        known = set()
+        for i in range(0, len(txids), 500):
+            chunk = txids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            known.update(
+                r[0] for r in self.conn.execute(
+                    f"SELECT txid FROM transactions WHERE coin=? AND height IS NOT NULL AND txid IN ({placeholders})",
+                    (coin, *chunk),
+                )
+            )
+        return known
+
+    def get_sync_state(self, coin) -> dict | None:
+        row = self.conn.execute(
+            "SELECT height, block_hash FROM sync_state WHERE coin=?",
+            (coin,),
+        ).fetchone()
+        if not row:
+            return None
+        return dict(height=row[0], block_hash=row[1])
+
+    def set_sync_state(self, coin, height, block_hash):
+        with self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO sync_state (coin, height, block_hash)
+                VALUES (?, ?, ?)
+                ON CONFLICT(coin) DO UPDATE SET
+                    height=excluded.height,
+                    block_hash=excluded.block_hash
+                """,
+                (coin, height, block_hash),
+            )
+
+    def rollback_sync(self, coin, height) -> int:
+        fork_height = max(height - REORG_DEPTH, 0)
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM transactions WHERE coin=? AND (height IS NULL OR height > ?)",
+                (coin, fork_height),
+            )
+            self.conn.execute("DELETE FROM sync_state WHERE coin=?", (coin,))
+            self.conn.execute("DELETE FROM utxos WHERE coin=?", (coin,))
+            self.conn.execute("DELETE FROM pending_txs WHERE coin=?", (coin,))
+        return cursor.rowcount
+
+    def update_utxos(self, coin, created: list[tuple], spent: list[tuple]):
+        with self.conn:
+            self._write_utxos(coin, created, spent)
+
+    def _write_utxos(self, coin, created: list[tuple], spent: list[tuple]):
+        self.conn.executemany(
+            """
+            INSERT INTO utxos (coin, txid, vout, satoshis, height)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(coin, txid, vout) DO UPDATE SET height=excluded.height
+            """,
+            ((coin, txid, vout, satoshis, height) for txid, vout, satoshis, height in created),
+        )
+        self.conn.executemany(
+            """
+            INSERT INTO utxos (coin, txid, vout, satoshis, spent_by)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(coin, txid, vout) DO UPDATE SET spent_by=excluded.spent_by
+            """,
+            ((coin, txid, vout, satoshis, spent_by) for txid, vout, satoshis, spent_by in spent),
+        )
+
+    def replace_utxos(self, coin, utxos: list[dict]):
+        with self.conn:
+            # Keep what our own pending broadcasts did until the explorer catches up.
+            local = self.conn.execute(
+                """
+                SELECT txid, vout, satoshis, height, spent_by
+                FROM utxos
+                WHERE coin=?1 AND (
+                    txid IN (SELECT txid FROM pending_txs WHERE coin=?1)
+                    OR spent_by IN (SELECT txid FROM pending_txs WHERE coin=?1)
+                )
+                """,
+                (coin,),
+            ).fetchall()
+            self.conn.execute("DELETE FROM utxos WHERE coin=?", (coin,))
+            self.conn.executemany(
+                """
+                INSERT OR IGNORE INTO utxos (coin, txid, vout, satoshis, height)
                 VALUES (?, ?, ?, ?, ?)
                 """,
-                (coin, txid, tx_type, amount, timestamp),
+                (
+                    (coin, u["txid"], int(u["vout"]), int(u["satoshis"]), u.get("height") or None)
+                    for u in utxos
+                ),
+            )
+            pending = {r[0] for r in self.conn.execute("SELECT txid FROM pending_txs WHERE coin=?", (coin,))}
+            self.conn.executemany(
+                """
+                INSERT OR IGNORE INTO utxos (coin, txid, vout, satoshis, height)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                ((coin, *row[:4]) for row in local if row[0] in pending),
+            )
+            self.conn.executemany(
+                "UPDATE utxos SET spent_by=? WHERE coin=? AND txid=? AND vout=?",
+                ((row[4], coin, row[0], row[1]) for row in local if row[4] in pending),
             )
-            conn.commit()
-            return True
-        except sqlite3.IntegrityError:
-            return False
-        finally:
-            conn.close()
 
-    def get_transactions(self, account, password, coin) -> list[dict]:
-        conn, _ = self.open_vault(account, password)
-        rows = conn.execute(
+    def add_pending_tx(self, coin, txid, expiry_height: int, spent: list[tuple], created: list[tuple]) -> int:
+        parents = list({prev_txid for prev_txid, *_ in spent})
+        with self.conn:
+            self._write_utxos(coin, created, spent)
+            row = self.conn.execute(
+                f"""
+                SELECT COALESCE(MAX(depth), 0)
+                FROM pending_txs
+                WHERE coin=? AND txid IN ({",".join("?" * len(parents))})
+                """,
+                (coin, *parents),
+            ).fetchone()
+            depth = row[0] + 1
+            self.conn.execute(
+                """
+                INSERT OR REPLACE INTO pending_txs (coin, txid, expiry_height, depth)
+                VALUES (?, ?, ?, ?)
+                """,
+                (coin, txid, expiry_height, depth),
+            )
+        return depth
+
+    def chainable_txids(self, coin, max_depth: int) -> set[str]:
+        rows = self.conn.execute(
+            "SELECT txid FROM pending_txs WHERE coin=? AND depth < ?",
+            (coin, max_depth),
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def prune_pending(self, coin, tip: int) -> list[str]:
+        with self.conn:
+            self.conn.execute(
+                """
+                DELETE FROM pending_txs
+                WHERE coin=?1 AND txid IN (
+                    SELECT txid FROM transactions WHERE coin=?1 AND height IS NOT NULL
+                )
+                """,
+                (coin,),
+            )
+            expired = [
+                r[0] for r in self.conn.execute(
+                    "SELECT txid FROM pending_txs WHERE coin=? AND expiry_height <= ?",
+                    (coin, tip),
+                )
+            ]
+            evicted = set(expired)
+            frontier = expired
+            while frontier:
+                placeholders = ",".join("?" * len(frontier))
+                children = {
+                    r[0] for r in self.conn.execute(
+                        f"""
+                        SELECT DISTINCT spent_by FROM utxos
+                        WHERE coin=? AND txid IN ({placeholders}) AND spent_by IS NOT NULL
+                        """,
+                        (coin, *frontier),
+                    )
+                }
+                frontier = list(children - evicted)
+                evicted |= children
+            if not evicted:
+                return []
+            txids = [(coin, txid) for txid in evicted]
+            self.conn.executemany("DELETE FROM pending_txs WHERE coin=? AND txid=?", txids)
+            self.conn.executemany("DELETE FROM utxos WHERE coin=? AND txid=?", txids)
+            self.conn.executemany("UPDATE utxos SET spent_by=NULL WHERE coin=? AND spent_by=?", txids)
+            self.conn.executemany(
+                "DELETE FROM transactions WHERE coin=? AND txid=? AND height IS NULL", txids
+            )
+        return sorted(evicted)
+
+    def get_utxos(self, coin, tip: int) -> list[dict]:
+        rows = self.conn.execute(
             """
-            SELECT txid, type, amount, timestamp
-            FROM transactions
-            WHERE coin=?
-            ORDER BY id DESC
+            SELECT txid, vout, satoshis, height
+            FROM utxos
+            WHERE coin=? AND spent_by IS NULL
+            ORDER BY satoshis DESC
             """,
             (coin,),
         ).fetchall()
-        conn.close()
+        return [
+            dict(
+                txid=r[0],
+                vout=r[1],
+                satoshis=r[2],
+                amount=r[2] / SATOSHIS,
+                height=r[3],
+                confirmations=max(tip - r[3] + 1, 0) if r[3] else 0
+            )
+            for r in rows
+        ]
+
+    def get_spendable_balance(self, coin) -> int:
+        row = self.conn.execute(
+            """
+            SELECT COALESCE(SUM(satoshis), 0)
+            FROM utxos
+            WHERE coin=? AND spent_by IS NULL AND height IS NOT NULL
+            """,
+            (coin,),
+        ).fetchone()
+        return row[0]
+
+    def get_transactions(self, coin, limit=None, before=None) -> list[dict]:
+        query = """
+            SELECT id, txid, type, amount, timestamp, height
+            FROM transactions
+            WHERE coin=?
+        """
+        params = [coin]
+        if before is not None:
+            query += " AND (timestamp, id) < (?, ?)"
+            params.extend(before)
+        query += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        rows = self.conn.execute(query, params).fetchall()
 
         return [
-            dict(txid=r[0], type=r[1], amount=r[2], timestamp=r[3])
+            dict(id=r[0], txid=r[1], type=r[2], amount=r[3], timestamp=r[4], height=r[5])
             for r in rows
         ]
     
 
-    def export_coin_data(
-        self,
-        account: str,
-        password: str,
-        coin: str,
-        output_path=None
-    ) -> bool:
+    def export_coin_data(self, coin: str, output_path=None) -> bool:
         
         try:
-            address = self.get_coin_address(account, password, coin)
-            wif = self.get_coin_wif(account, password, coin)
+            address = self.get_coin_address(coin)
+            wif = self.get_coin_wif(coin)
         except Exception:
             return False
 
         if not address or not wif:
             return False
 
-        txs = self.get_transactions(account, password, coin)
+        account = self.account
+        txs = self.get_transactions(coin)
         if output_path is None:
-            safe_account = re.sub(r"[^a-zA-Z0-9_-]", "_", account)
-            filename = f"{safe_account}_{coin}_export.txt"
+            filename = f"{self.vault.safe_account(account)}_{coin}_export.txt"
             output_path = self.app.paths.data / filename
 
         lines = []
@@ -252,8 +660,10 @@ class Vault:
             for i, tx in enumerate(txs, 1):
                 lines.append(f"[{i}]")
                 for k, v in tx.items():
+                    if k == "id":
+                        continue
                     if k.lower() == "amount":
-                        v = self.app.utils.format_balance(v)
+                        v = self.app.utils.format_balance(v / SATOSHIS)
                     lines.append(f"  {k.upper():12}: {v}")
                 lines.append("")
 
@@ -261,3 +671,74 @@ class Vault:
 
         output_path.write_text("\n".join(lines), encoding="utf-8")
         return True
+
+
+class AsyncVaultSession:
+    def __init__(self, vault: Vault, session: VaultSession):
+        self.vault = vault
+        self.session = session
+        self.account = session.account
+
+    @property
+    def locked(self) -> bool:
+        return self.session.locked
+
+    async def lock(self):
+        await self.vault.run(self.session.lock)
+
+    async def add_coin(self, coin, address, wif) -> bool:
+        return await self.vault.run(self.session.add_coin, coin, address, wif)
+
+    async def list_coins(self) -> list[str]:
+        return await self.vault.run(self.session.list_coins)
+
+    async def get_coin_address(self, coin):
+        return await self.vault.run(self.session.get_coin_address, coin)
+
+    async def get_coin_wif(self, coin):
+        return await self.vault.run(self.session.get_coin_wif, coin)
+
+    async def add_transaction(self, coin, tx_type, txid, amount, timestamp) -> bool:
+        return await self.vault.run(self.session.add_transaction, coin, tx_type, txid, amount, timestamp)
+
+    async def add_transactions(self, coin, rows: list[dict]) -> list[str]:
+        return await self.vault.run(self.session.add_transactions, coin, rows)
+
+    async def known_txids(self, coin, txids: list[str]) -> set[str]:
+        return await self.vault.run(self.session.known_txids, coin, txids)
+
+    async def get_sync_state(self, coin) -> dict | None:
+        return await self.vault.run(self.session.get_sync_state, coin)
+
+    async def set_sync_state(self, coin, height, block_hash):
+        return await self.vault.run(self.session.set_sync_state, coin, height, block_hash)
+
+    async def rollback_sync(self, coin, height) -> int:
+        return await self.vault.run(self.session.rollback_sync, coin, height)
+
+    async def update_utxos(self, coin, created: list[tuple], spent: list[tuple]):
+        return await self.vault.run(self.session.update_utxos, coin, created, spent)
+
+    async def replace_utxos(self, coin, utxos: list[dict]):
+        return await self.vault.run(self.session.replace_utxos, coin, utxos)
+
+    async def add_pending_tx(self, coin, txid, expiry_height: int, spent: list[tuple], created: list[tuple]) -> int:
+        return await self.vault.run(self.session.add_pending_tx, coin, txid, expiry_height, spent, created)
+
+    async def chainable_txids(self, coin, max_depth: int) -> set[str]:
+        return await self.vault.run(self.session.chainable_txids, coin, max_depth)
+
+    async def prune_pending(self, coin, tip: int) -> list[str]:
+        return await self.vault.run(self.session.prune_pending, coin, tip)
+
+    async def get_utxos(self, coin, tip: int) -> list[dict]:
+        return await self.vault.run(self.session.get_utxos, coin, tip)
+
+    async def get_spendable_balance(self, coin) -> int:
+        return await self.vault.run(self.session.get_spendable_balance, coin)
+
+    async def get_transactions(self, coin, limit=None, before=None) -> list[dict]:
+        return await self.vault.run(self.session.get_transactions, coin, limit, before)
+
+    async def export_coin_data(self, coin: str, output_path=None) -> bool:
+        return await self.vault.run(self.session.export_coin_data, coin, output_path)
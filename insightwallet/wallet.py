@@ -1,7 +1,5 @@
 
-import asyncio
-import subprocess
-import json
+from collections import OrderedDict
 from toga import App, Box, Label, Button, Divider, Command, Group, ScrollContainer
 from toga.style.pack import Pack
 from toga.constants import COLUMN, ROW, CENTER, Direction, BOLD, NORMAL
@@ -10,8 +8,11 @@ from toga.platform import current_platform
 from .coin import Coin
 
 
+COIN_VIEW_CACHE = 4
+
+
 class Wallet(Box):
-    def __init__(self, app:App):
+    def __init__(self, app:App, view_cache: int = COIN_VIEW_CACHE):
         super().__init__(
             style=Pack(
                 direction=COLUMN,
@@ -23,6 +24,8 @@ class Wallet(Box):
         self.app = app
         self._is_generating = None
         self.coin_view = None
+        self.coin_views = OrderedDict()
+        self.view_cache = max(view_cache, 1)
 
         self.account_panel = Box(
             style=Pack(
@@ -220,11 +223,12 @@ class Wallet(Box):
                 visit_cmd,
                 about_cmd
             )
-        self.show_coins_list()
+        self.app.loop.create_task(self.show_coins_list())
 
 
-    def show_coins_list(self):
-        wallet = self.app.vault.list_coins(self.app.account, self.app.password)
+    async def show_coins_list(self):
+        wallet = await self.app.session.list_coins()
+        self.app.loop.create_task(self.app.sync.start())
         for coin in wallet:
             coin_button = Button(
                 text=coin,
@@ -232,12 +236,12 @@ class Wallet(Box):
                     font_size=12,
                     width=100
                 ),
-                on_press=lambda widget, coin=coin: self.manage_coin(coin, widget)
+                on_press=self.coin_handler(coin)
             )
             self.coins_list.add(coin_button)
 
         
-    def show_add_coins(self, button):
+    async def show_add_coins(self, button):
         self.add_coins_list.clear()
         self.coins_container.content = self.add_coins_list
         self.coins_panel.remove(
@@ -247,7 +251,7 @@ class Wallet(Box):
             self.cancel_button
         )
         self.coins_label.text = "+ Add Coin"
-        wallet = self.app.vault.list_coins(self.app.account, self.app.password)
+        wallet = await self.app.session.list_coins()
         coins = self.app.utils.get_available_coins()
         for coin in coins:
             if coin not in wallet:
@@ -258,7 +262,7 @@ class Wallet(Box):
                         font_weight=BOLD,
                         width=100
                     ),
-                    on_press=lambda widget, coin=coin: self.confirm_add_coin(coin)
+                    on_press=self.add_coin_handler(coin)
                 )
                 self.add_coins_list.add(coin_button)
 
@@ -278,22 +282,23 @@ class Wallet(Box):
         self.coins_container.content = self.coins_list
 
 
-    def insert_coin(self, coin, address, wif):
-        self.app.vault.add_coin(self.app.account, self.app.password, coin, address, wif)
+    async def insert_coin(self, coin, address, wif):
+        await self.app.session.add_coin(coin, address, wif)
+        self.app.loop.create_task(self.app.sync.add_coin(coin))
         coin_button = Button(
             text=coin,
             style=Pack(
                 font_size=12,
                 width=100
             ),
-            on_press=lambda widget, coin=coin: self.manage_coin(coin, widget)
+            on_press=self.coin_handler(coin)
         )
         self.coins_list.add(coin_button)
         self.restore_coins_list()
         self._is_generating = None
 
 
-    def confirm_add_coin(self, coin):
+    async def confirm_add_coin(self, coin):
         if self._is_generating:
             return
         self._is_generating = True
@@ -308,56 +313,57 @@ class Wallet(Box):
             return
         address = hdwallet["address"]
         wif = hdwallet["wif"]
-        self.insert_coin(coin, address, wif)
+        await self.insert_coin(coin, address, wif)
 
 
     async def generate_address(self, coin):
         coin_info = self.app.utils.get_coin(coin)
         network = coin_info["network"]
-        wallet_cli = str(self.app.utils.get_tool())
-        cmd = [wallet_cli, "--network", network, "--gen-address"]
-        try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=0
-            )
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                self.app.main_window.error_dialog(
-                    "Error", f"Failed to generate address: {stderr.decode()}"
-                )
-                return
-            raw = stdout.decode().strip()
-            try:
-                data = json.loads(raw)
-                address = data["address"]
-                wif = data["wif"]
-                self.insert_coin(coin, address, wif)
-            except json.JSONDecodeError as e:
-                self.app.main_window.error_dialog(
-                    "Error",
-                    f"Invalid JSON from address generator:\n{raw}"
-                )
-        except Exception as e:
+        data, error = await self.app.worker.call("gen_address", network=network)
+        if error:
             self.app.main_window.error_dialog(
-                "Error", f"Failed to generate address: {e}"
+                "Error", f"Failed to generate address: {error}"
             )
+            return
+        await self.insert_coin(coin, data["address"], data["wif"])
+
+
+    def coin_handler(self, coin):
+        async def on_press(widget):
+            await self.manage_coin(coin, widget)
+        return on_press
 
 
-    def manage_coin(self, coin, button):
+    def add_coin_handler(self, coin):
+        async def on_press(widget):
+            await self.confirm_add_coin(coin)
+        return on_press
+
+
+    async def manage_coin(self, coin, button):
         if self.app.coin == coin:
             return
+        view = self.coin_views.get(coin)
+        if view is None:
+            address = await self.app.session.get_coin_address(coin)
+            # Another press may have switched coins while the address was read.
+            if not address or self.app.coin == coin:
+                return
+            view = self.coin_views.get(coin) or Coin(self.app, coin, address)
         if self.coin_view:
-            self.coin_view.toggle = None
+            self.coin_view.detach()
         self.app.loop.create_task(self.update_buttons(button))
         self.app.coin = coin
-        address = self.app.vault.get_coin_address(self.app.account, self.app.password, coin)
-        if address:
-            self.coin_manage.clear()
-            self.coin_view = Coin(self.app, address)
-            self.coin_manage.add(self.coin_view)
+        # Hidden views stay built and parked, the least recently shown is dropped.
+        self.coin_views.pop(coin, None)
+        self.coin_views[coin] = view
+        while len(self.coin_views) > self.view_cache:
+            _, evicted = self.coin_views.popitem(last=False)
+            evicted.detach(park=False)
+        self.coin_manage.clear()
+        self.coin_view = view
+        self.coin_manage.add(view)
+        view.attach()
             
 
     async def update_buttons(self, button):
@@ -0,0 +1,204 @@
+
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+
+from toga import App
+from toga.platform import current_platform
+
+
+START_TIMEOUT = 10
+CALL_TIMEOUT = 60
+STREAM_LIMIT = 16 * 1024 * 1024
+
+
+class WalletWorker:
+    def __init__(self, app:App):
+
+        self.app = app
+        self.process = None
+        self.reader_task = None
+        self.pending = {}
+        self.next_id = 0
+        self.serve_supported = None
+        self.start_lock = asyncio.Lock()
+
+
+    def creationflags(self):
+        return subprocess.CREATE_NO_WINDOW if current_platform == "windows" else 0
+
+
+    def running(self):
+        return self.process is not None and self.process.returncode is None
+
+
+    async def start(self):
+        async with self.start_lock:
+            if self.running():
+                return True
+            if self.serve_supported is False:
+                return False
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    str(self.app.utils.get_tool()), "--serve",
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    limit=STREAM_LIMIT,
+                    creationflags=self.creationflags()
+                )
+            except Exception:
+                self.process = None
+                return False
+            process = self.process
+            self.reader_task = asyncio.create_task(self.read_responses(process))
+            try:
+                result = await asyncio.wait_for(self._send("ping", {}), START_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError, RuntimeError):
+                result = None
+            if result == "pong":
+                self.serve_supported = True
+                return True
+            # Builds without --serve exit on the unknown flag; a slow or hung
+            # start is only killed, the next call tries the worker again.
+            if self.reader_task.done():
+                try:
+                    await asyncio.wait_for(process.wait(), 2)
+                except asyncio.TimeoutError:
+                    pass
+            exit_code = process.returncode
+            await self.stop(kill=True)
+            if exit_code not in (None, 0) and self.serve_supported is None:
+                self.serve_supported = False
+            return False
+
+
+    async def read_responses(self, process):
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                future = self.pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(RuntimeError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("wallet-cli worker exited"))
+            self.pending.clear()
+
+
+    async def _send(self, method, params):
+        if self.reader_task is None or self.reader_task.done():
+            raise ConnectionError("wallet-cli worker is not running")
+        self.next_id += 1
+        request_id = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        line = json.dumps({"id": request_id, "method": method, "params": params}) + "\n"
+        try:
+            try:
+                self.process.stdin.write(line.encode())
+                await self.process.stdin.drain()
+            except (ConnectionError, AttributeError) as e:
+                raise ConnectionError(str(e))
+            return await future
+        finally:
+            self.pending.pop(request_id, None)
+
+
+    async def call(self, method, **params):
+        # Builds of wallet-cli without --serve fail the ping and are run once per call.
+        for _ in range(2):
+            if not await self.start():
+                break
+            try:
+                return await asyncio.wait_for(self._send(method, params), CALL_TIMEOUT), None
+            except asyncio.TimeoutError:
+                # A hung worker is killed; the next call starts a fresh one.
+                await self.stop(kill=True)
+                return None, "wallet-cli worker timed out"
+            except RuntimeError as e:
+                return None, str(e)
+            except ConnectionError:
+                # The worker died mid-request, restart it and retry once.
+                continue
+        return await self.call_once(method, params)
+
+
+    async def call_once(self, method, params):
+        cmd = [str(self.app.utils.get_tool()), "--network", params["network"]]
+        utxos_file = None
+        if method == "gen_address":
+            cmd += ["--gen-address"]
+        elif method == "address_from_wif":
+            cmd += ["--address-from-wif", "--wif", params["wif"]]
+        elif method == "build_transaction" and "outputs" in params:
+            return None, "Multiple outputs need a wallet-cli build with --serve"
+        elif method == "build_transaction":
+            # Hundreds of UTXOs overflow the 32,767 character Windows command line.
+            with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+                json.dump(params["utxos"], f)
+                utxos_file = f.name
+            cmd += [
+                "--wif", params["wif"],
+                "--to", params["to"],
+                "--amount", str(params["amount"]),
+                "--fee", str(params["fee"]),
+                "--utxos-file", utxos_file,
+                "--blockheight", str(params["blockheight"])
+            ]
+        else:
+            return None, f"Unsupported wallet-cli method {method}"
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                creationflags=self.creationflags()
+            )
+            stdout, stderr = await process.communicate()
+        except Exception as e:
+            return None, str(e)
+        finally:
+            if utxos_file:
+                os.unlink(utxos_file)
+        if process.returncode != 0:
+            return None, stderr.decode().strip() or "wallet-cli failed"
+        output = stdout.decode().strip()
+        if method == "gen_address":
+            try:
+                return json.loads(output), None
+            except json.JSONDecodeError:
+                return None, f"Invalid JSON from address generator:\n{output}"
+        return output, None
+
+
+    async def stop(self, kill: bool = False):
+        process = self.process
+        self.process = None
+        if process and process.returncode is None:
+            try:
+                if kill:
+                    raise ConnectionError("killing wallet-cli worker")
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), 2)
+            except (asyncio.TimeoutError, ConnectionError):
+                process.kill()
+                await process.wait()
+        if self.reader_task:
+            if kill:
+                self.reader_task.cancel()
+            await asyncio.gather(self.reader_task, return_exceptions=True)
+            self.reader_task = None
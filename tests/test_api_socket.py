@@ -0,0 +1,198 @@
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from insightwallet.api import InsightAPI
+
+
+ADDRESS = "t1TestAddress"
+
+
+async def serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/api"
+
+
+async def run_subscription(coin, routes, wait_for):
+    runner, url = await serve(routes)
+    api = InsightAPI(SimpleNamespace(coin=coin), coin)
+    api.set_endpoints([url])
+    blocks = []
+    txids = []
+    done = asyncio.Event()
+
+    def on_block(block):
+        blocks.append(block)
+        if wait_for(blocks, txids):
+            done.set()
+
+    def on_address(txid):
+        txids.append(txid)
+        if wait_for(blocks, txids):
+            done.set()
+
+    task = asyncio.create_task(api.subscribe(ADDRESS, on_block, on_address))
+    try:
+        await asyncio.wait_for(done.wait(), 10)
+        connected = api.socket_connected
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await api.close()
+        await runner.cleanup()
+    return blocks, txids, connected
+
+
+def test_insight_socket_subscribes_and_dispatches():
+    received = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str('0{"sid":"x","pingInterval":25000,"pingTimeout":60000}')
+        received.append((await ws.receive()).data)
+        received.append((await ws.receive()).data)
+        await ws.send_str("2")
+        received.append((await ws.receive()).data)
+        await ws.send_str('42["block","00000000abc"]')
+        await ws.send_str("42" + json.dumps(["bitcoind/addresstxid", {"address": ADDRESS, "txid": "ff" * 32}]))
+        await ws.receive()
+        return ws
+
+    blocks, txids, connected = asyncio.run(run_subscription(
+        "BTCZ",
+        [web.get("/socket.io/", handler)],
+        lambda blocks, txids: len(blocks) == 2 and txids
+    ))
+    assert received == [
+        '42["subscribe","inv"]',
+        "42" + json.dumps(["subscribe", "bitcoind/addresstxid", [ADDRESS]]),
+        "3",
+    ]
+    assert blocks == [None, "00000000abc"]
+    assert txids == ["ff" * 32]
+    assert connected
+
+
+def test_insight_socket_pings_during_busy_stream():
+    pings = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str('0{"sid":"x","pingInterval":300,"pingTimeout":60000}')
+
+        async def flood():
+            while True:
+                await ws.send_str('42["block","00000000abc"]')
+                await asyncio.sleep(0.05)
+
+        task = asyncio.create_task(flood())
+        try:
+            async for msg in ws:
+                if msg.data == "2":
+                    pings.append(msg.data)
+                    await ws.send_str("42" + json.dumps(["bitcoind/addresstxid", {"txid": "dd" * 32}]))
+        finally:
+            task.cancel()
+        return ws
+
+    blocks, txids, connected = asyncio.run(run_subscription(
+        "BTCZ",
+        [web.get("/socket.io/", handler)],
+        lambda blocks, txids: txids
+    ))
+    assert pings
+    assert txids == ["dd" * 32]
+
+
+def test_blockbook_socket_subscribes_and_dispatches():
+    received = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        for _ in range(2):
+            message = json.loads((await ws.receive()).data)
+            received.append(message)
+            await ws.send_json({"id": message["id"], "data": {"subscribed": True}})
+        await ws.send_json({"id": "block", "data": {"height": 3_000_000, "hash": "00ab"}})
+        await ws.send_json({"id": "address", "data": {"address": ADDRESS, "tx": {"txid": "ee" * 32}}})
+        await ws.receive()
+        return ws
+
+    blocks, txids, connected = asyncio.run(run_subscription(
+        "ZEC",
+        [web.get("/websocket", handler)],
+        lambda blocks, txids: len(blocks) == 2 and txids
+    ))
+    assert received == [
+        {"id": "block", "method": "subscribeNewBlock", "params": {}},
+        {"id": "address", "method": "subscribeAddresses", "params": {"addresses": [ADDRESS]}},
+    ]
+    assert blocks == [None, 3_000_000]
+    assert txids == ["ee" * 32]
+    assert connected
+
+
+def test_socket_reconnects_after_drop():
+    connections = []
+
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(request)
+        for _ in range(2):
+            await ws.receive()
+        if len(connections) == 1:
+            await ws.close()
+            return ws
+        await ws.send_json({"id": "block", "data": {"height": 7}})
+        await ws.receive()
+        return ws
+
+    blocks, txids, connected = asyncio.run(run_subscription(
+        "ZEC",
+        [web.get("/websocket", handler)],
+        lambda blocks, txids: 7 in blocks
+    ))
+    assert len(connections) == 2
+    # Each connection announces itself with on_block(None) before real blocks.
+    assert blocks == [None, None, 7]
+    assert connected
+
+
+def test_socket_rejects_bad_handshake():
+    async def handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str("not socket.io")
+        await ws.receive()
+        return ws
+
+    async def main():
+        runner, url = await serve([web.get("/socket.io/", handler)])
+        api = InsightAPI(SimpleNamespace(coin="BTCZ"), "BTCZ")
+        api.set_endpoints([url])
+        blocks = []
+        task = asyncio.create_task(api.subscribe(ADDRESS, blocks.append, blocks.append))
+        await asyncio.sleep(0.5)
+        connected = api.socket_connected
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await api.close()
+        await runner.cleanup()
+        return blocks, connected
+
+    blocks, connected = asyncio.run(main())
+    assert blocks == []
+    assert not connected
@@ -0,0 +1,55 @@
+
+import pytest
+
+from insightwallet import transaction
+from insightwallet.address import hash160
+
+
+RAW_TX = (
+    "0400008085202f8902111111111111111111111111111111111111111111111111111111111111"
+    "1111000000006a473044022003db383196886aa9f5330d7cd82970ecd25299eb88919d6fa3f20e"
+    "08abee27230220164620f40f08116393c3378b42b0fb38dd85da0fc6bd977ce79dbfeaff2153b8"
+    "0121031b84c5567b126440995d3ed5aaba0565d71e1834604819ff9c17f5e9d5dd078fffffffff"
+    "2222222222222222222222222222222222222222222222222222222222222222030000006b4830"
+    "45022100def33b0e297b01517e04332468a15171f9a27249d639eab31d2300fbb879f5440220"
+    "2c0130e07975656ce3c9788f8805ccdf043567fb4ad1b9b7cd174e8f270ab4ef0121031b84c556"
+    "7b126440995d3ed5aaba0565d71e1834604819ff9c17f5e9d5dd078fffffffff03a08601000000"
+    "00001976a914eaddee0d07bfc3e11c94f41eff618c1df3c2069b88ac50c30000000000001"
+    "7a914fd8348f4b7d5e615256b7f9254793c72f70f977d8750c30000000000001976a91479b000"
+    "887626b294a914501a4cd226b58b23598388ac000000006c430f000000000000000000000000"
+)
+RAW_TXID = "1443d506ed58cc1e5c511a293d8f62f96f5696d2ee403f2f1b88086d9923b1e7"
+
+
+def test_parse_transaction_transparent():
+    tx = transaction.parse_transaction(RAW_TX)
+    assert tx["txid"] == RAW_TXID
+    assert tx["overwintered"]
+    assert tx["version"] == transaction.SAPLING_VERSION
+    assert tx["version_group_id"] == transaction.SAPLING_VERSION_GROUP_ID
+    assert tx["inputs"] == [("11" * 32, 0), ("22" * 32, 3)]
+    assert [satoshis for satoshis, _ in tx["outputs"]] == [100_000, 50_000, 50_000]
+    assert tx["outputs"][2][1] == transaction.p2pkh_script(hash160(tx["script_sigs"][0][-33:]))
+    assert tx["expiry_height"] == 1_000_300
+    assert transaction.serialize_transaction(tx).hex() == RAW_TX
+
+
+def test_parse_transaction_shielded_round_trip():
+    tx = dict(
+        transaction.parse_transaction(RAW_TX),
+        value_balance=-5_000,
+        shielded_spends=[bytes([1]) * transaction.SPEND_SIZE],
+        shielded_outputs=[bytes([2]) * transaction.OUTPUT_SIZE] * 2,
+        joinsplits=[bytes([3]) * transaction.JOINSPLIT_SIZE],
+        joinsplit_pubkey=bytes([4]) * 32,
+        joinsplit_sig=bytes([5]) * 64,
+        binding_sig=bytes([6]) * 64,
+    )
+    raw = transaction.serialize_transaction(tx)
+    parsed = transaction.parse_transaction(raw.hex())
+    for key in ("value_balance", "shielded_spends", "shielded_outputs", "joinsplits",
+                "joinsplit_pubkey", "joinsplit_sig", "binding_sig", "inputs", "outputs"):
+        assert parsed[key] == tx[key]
+    assert transaction.serialize_transaction(parsed) == raw
+    with pytest.raises(ValueError):
+        transaction.parse_transaction(raw[:-1].hex())